@@ -0,0 +1,164 @@
+import math
+from collections import OrderedDict
+
+import pygame
+
+import assets
+
+# rotations are rounded to this many degrees, 360 / ANGLE_STEP variants per frame and scale at most
+ANGLE_STEP = 10
+SCALE_STEP = 0.1
+VARIANT_CAPACITY = 512
+EXPLOSION = "Assets/explosion.png"
+EXPLOSION_SECONDS = 0.4
+EXPLOSION_SCALES = (0.4, 0.7, 1.0, 1.2, 1.4, 1.2)
+
+
+def quantize(value: float, step: float) -> float:
+    return round(value / step) * step
+
+
+def facing(vx: float, vy: float) -> float:
+    # rotation that turns a sprite drawn facing down towards (vx, vy), counter-clockwise degrees
+    if vx == 0.0 and vy == 0.0:
+        return 0.0
+    return math.degrees(math.atan2(vx, vy))
+
+
+class VariantCache:
+    # LRU of rotated and scaled copies keyed by (surface, angle, scale), shared by every instance
+
+    def __init__(self, capacity: int = VARIANT_CAPACITY, angle_step: float = ANGLE_STEP,
+                 scale_step: float = SCALE_STEP):
+        self.capacity = capacity
+        self.angle_step = angle_step
+        self.scale_step = scale_step
+        self.surfaces = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.bytes_resident = 0
+
+    def get(self, surface, angle: float = 0.0, scale: float = 1.0):
+        angle = quantize(angle, self.angle_step) % 360
+        scale = quantize(scale, self.scale_step)
+        if angle == 0 and scale == 1.0:
+            return surface
+        key = (surface, angle, scale)
+        variant = self.surfaces.get(key)
+        if variant is not None:
+            self.surfaces.move_to_end(key)
+            self.hits += 1
+            return variant
+        self.misses += 1
+        variant = pygame.transform.rotozoom(surface, angle, scale)
+        self.surfaces[key] = variant
+        self.bytes_resident += variant.get_pitch() * variant.get_height()
+        if len(self.surfaces) > self.capacity:
+            _, evicted = self.surfaces.popitem(last=False)
+            self.bytes_resident -= evicted.get_pitch() * evicted.get_height()
+        return variant
+
+    def precompute(self, frames, scales=(1.0,), rotate: bool = True):
+        # every rotation (or only the upright one) of every frame and scale up front, returns how many were built
+        before = self.misses
+        steps = int(round(360 / self.angle_step)) if rotate else 1
+        for frame in frames:
+            for scale in scales:
+                for step in range(steps):
+                    self.get(frame, step * self.angle_step, scale)
+        return self.misses - before
+
+    def blit_centered(self, win, surface, pos, angle: float = 0.0, scale: float = 1.0):
+        # draws the variant around the centre the unrotated surface would have at pos
+        variant = self.get(surface, angle, scale)
+        x = pos[0] + (surface.get_width() - variant.get_width()) / 2
+        y = pos[1] + (surface.get_height() - variant.get_height()) / 2
+        return win.blit(variant, (x, y))
+
+    def stats(self):
+        return {
+            'variants': len(self.surfaces),
+            'hits': self.hits,
+            'misses': self.misses,
+            'bytes_resident': self.bytes_resident,
+        }
+
+    def clear(self):
+        self.surfaces.clear()
+        self.bytes_resident = 0
+
+
+class Animation:
+    # frames shared by every instance, picked by how long the instance has been playing it
+
+    def __init__(self, frames, fps: float, loop: bool = True):
+        self.frames = tuple(frames)
+        self.fps = fps
+        self.loop = loop
+        self.duration = len(self.frames) / fps
+
+    def index_at(self, seconds: float) -> int:
+        index = int(seconds * self.fps)
+        if self.loop:
+            return index % len(self.frames)
+        return min(index, len(self.frames) - 1)
+
+    def frame_at(self, seconds: float):
+        return self.frames[self.index_at(seconds)]
+
+    def done(self, seconds: float) -> bool:
+        return not self.loop and seconds >= self.duration
+
+
+_animations = {}
+
+
+def shared(paths, fps: float, loop: bool = True) -> Animation:
+    # one Animation per list of sprite files, however many entities play it
+    key = (tuple(paths), fps, loop)
+    animation = _animations.get(key)
+    if animation is None:
+        frames = [assets.image(path) for path in paths]
+        for frame in frames:
+            assets.mask(frame)
+        animation = _animations[key] = Animation(frames, fps, loop)
+    return animation
+
+
+def strip_frames(sheet):
+    # square frames laid out left to right, a single square image is one frame
+    size = sheet.get_height()
+    return [sheet.subsurface((x, 0, size, size)) for x in range(0, sheet.get_width() - size + 1, size)]
+
+
+class Explosion:
+    # explosion.png frames grown and shrunk over EXPLOSION_SECONDS, drawn from the variant cache
+
+    def __init__(self, x: float, y: float, started: float):
+        # frames are looked up on the first render, a headless game never loads them
+        self.x = x
+        self.y = y
+        self.started = started
+
+    def done(self, now: float) -> bool:
+        return now - self.started >= EXPLOSION_SECONDS
+
+    def render(self, win, now: float):
+        progress = min(max((now - self.started) / EXPLOSION_SECONDS, 0.0), 0.999)
+        step = int(progress * len(EXPLOSION_SCALES))
+        frames = explosion_frames()
+        frame = frames[int(progress * len(frames))]
+        variants.blit_centered(win, frame, (self.x, self.y), 0.0, EXPLOSION_SCALES[step])
+
+
+_explosion_frames = None
+
+
+def explosion_frames():
+    global _explosion_frames
+    if _explosion_frames is None:
+        _explosion_frames = strip_frames(assets.image(EXPLOSION))
+    return _explosion_frames
+
+
+variants = VariantCache()
@@ -0,0 +1,191 @@
+import json
+import os
+
+import pygame
+
+# written by build_atlas.py, sprites listed in the index are cut out of the one atlas image
+ATLAS_IMAGE = "Assets/atlas.png"
+ATLAS_INDEX = "Assets/atlas.json"
+
+
+class AssetCache:
+
+    def __init__(self, atlas_index: str = ATLAS_INDEX):
+        self.images = {}
+        self.sounds = {}
+        self.fonts = {}
+        # collision masks keyed by the surface they were built from, one per sprite frame
+        self.masks = {}
+        self.hits = 0
+        self.misses = 0
+        self.bytes_resident = 0
+        self._converted = set()
+        self.atlas_index = atlas_index
+        self.atlas = None
+        self.atlas_rects = {}
+        self._atlas_checked = False
+        self._atlas_converted = False
+
+    def load_atlas(self, index_path: str = None) -> bool:
+        # False when there is no atlas build, images then come from their own files
+        self._atlas_checked = True
+        index_path = index_path or self.atlas_index
+        if not os.path.exists(index_path):
+            return False
+        with open(index_path) as file:
+            index = json.load(file)
+        atlas = pygame.image.load(index['image'])
+        self._atlas_converted = pygame.display.get_surface() is not None
+        if self._atlas_converted:
+            atlas = atlas.convert_alpha()
+        self.atlas = atlas
+        self.atlas_rects = {path: pygame.Rect(rect) for path, rect in index['sprites'].items()}
+        self.bytes_resident += atlas.get_pitch() * atlas.get_height()
+        return True
+
+    def ready(self, path: str) -> bool:
+        # True when image(path) will not touch the disk
+        if not self._atlas_checked:
+            self.load_atlas()
+        return path in self.images or path in self.atlas_rects
+
+    def image(self, path: str, alpha: bool = True):
+        surface = self.images.get(path)
+        if surface is not None:
+            self.hits += 1
+            return surface
+        self.misses += 1
+        if not self._atlas_checked:
+            self.load_atlas()
+        rect = self.atlas_rects.get(path)
+        if rect is not None:
+            # shares the atlas pixels, nothing new is resident
+            surface = self.atlas.subsurface(rect)
+            self.images[path] = surface
+            if self._atlas_converted:
+                self._converted.add(path)
+            return surface
+        return self.add_image(path, pygame.image.load(path), alpha)
+
+    def add_image(self, path: str, surface, alpha: bool = True):
+        # takes a surface decoded elsewhere (e.g. a loader thread), converts it if the display is up
+        if pygame.display.get_surface() is not None:
+            surface = surface.convert_alpha() if alpha else surface.convert()
+            self._converted.add(path)
+        self.images[path] = surface
+        self.bytes_resident += surface.get_pitch() * surface.get_height()
+        return surface
+
+    def sound(self, path: str):
+        sound = self.sounds.get(path)
+        if sound is not None:
+            self.hits += 1
+            return sound
+        self.misses += 1
+        return self.add_sound(path, pygame.mixer.Sound(path))
+
+    def add_sound(self, path: str, sound):
+        self.sounds[path] = sound
+        self.bytes_resident += sound_bytes(sound)
+        return sound
+
+    def font(self, path: str, size: int):
+        key = (path, size)
+        font = self.fonts.get(key)
+        if font is not None:
+            self.hits += 1
+            return font
+        self.misses += 1
+        font = pygame.font.Font(path, size)
+        self.fonts[key] = font
+        return font
+
+    def mask(self, surface):
+        mask = self.masks.get(surface)
+        if mask is None:
+            mask = pygame.mask.from_surface(surface)
+            self.masks[surface] = mask
+        return mask
+
+    def convert(self):
+        # images loaded before the display existed are still in file format, convert them once now.
+        # surfaces handed out earlier keep the old format, so call this before building entities.
+        if pygame.display.get_surface() is None:
+            return 0
+        converted = 0
+        if self.atlas is not None and not self._atlas_converted:
+            self.bytes_resident -= self.atlas.get_pitch() * self.atlas.get_height()
+            self.atlas = self.atlas.convert_alpha()
+            self.bytes_resident += self.atlas.get_pitch() * self.atlas.get_height()
+            self._atlas_converted = True
+            converted += 1
+            for path in self.images:
+                rect = self.atlas_rects.get(path)
+                if rect is not None:
+                    self.images[path] = self.atlas.subsurface(rect)
+                    self._converted.add(path)
+        for path, surface in self.images.items():
+            if path in self._converted:
+                continue
+            self.bytes_resident -= surface.get_pitch() * surface.get_height()
+            surface = surface.convert_alpha()
+            self.bytes_resident += surface.get_pitch() * surface.get_height()
+            self.images[path] = surface
+            self._converted.add(path)
+            converted += 1
+        return converted
+
+    def stats(self):
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'bytes_resident': self.bytes_resident,
+            'images': len(self.images),
+            'sounds': len(self.sounds),
+            'fonts': len(self.fonts),
+            'masks': len(self.masks),
+        }
+
+    def reset_counters(self):
+        self.hits = 0
+        self.misses = 0
+
+    def clear(self):
+        self.images.clear()
+        self.sounds.clear()
+        self.fonts.clear()
+        self.masks.clear()
+        self._converted.clear()
+        self.atlas = None
+        self.atlas_rects = {}
+        self._atlas_checked = False
+        self._atlas_converted = False
+        self.bytes_resident = 0
+        self.reset_counters()
+
+
+def sound_bytes(sound) -> int:
+    mixer = pygame.mixer.get_init()
+    if mixer is None:
+        return 0
+    frequency, size, channels = mixer
+    return int(sound.get_length() * frequency) * (abs(size) // 8) * channels
+
+
+cache = AssetCache()
+
+
+def image(path: str, alpha: bool = True):
+    return cache.image(path, alpha)
+
+
+def sound(path: str):
+    return cache.sound(path)
+
+
+def font(path: str, size: int):
+    return cache.font(path, size)
+
+
+def mask(surface):
+    return cache.mask(surface)
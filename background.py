@@ -0,0 +1,98 @@
+import random
+
+import pygame
+
+import assets
+
+SCREEN_SIZE = (800, 600)
+BASE_IMAGE = "Assets/background1.png"
+# px/s the landscape drifts left, the star layers in front of it move faster the closer they are
+BASE_SPEED = 4.0
+# (number of stars, px/s, colour, radius)
+STAR_LAYERS = (
+    (240, 10.0, (120, 120, 170), 1),
+    (110, 24.0, (190, 190, 240), 1),
+    (40, 55.0, (255, 255, 255), 2),
+)
+TRANSPARENT = (0, 0, 0)
+
+
+class Layer:
+    # one pre-rendered tile repeated across the screen and shifted by its velocity times the scroll time
+
+    def __init__(self, tile, velocity):
+        self.tile = tile
+        self.velocity = velocity
+
+    def draw(self, win, seconds: float):
+        tile = self.tile
+        width, height = tile.get_size()
+        screen_width, screen_height = win.get_size()
+        x = int(-self.velocity[0] * seconds) % width
+        y = int(-self.velocity[1] * seconds) % height
+        # a tile at least as large as the screen needs two blits per scrolling axis, one when it stands still
+        first_y = y - height if y else 0
+        while first_y < screen_height:
+            first_x = x - width if x else 0
+            while first_x < screen_width:
+                win.blit(tile, (first_x, first_y))
+                first_x += width
+            first_y += height
+
+
+def mirrored_tile(image):
+    # the image next to its mirror image, so scrolling wraps without a seam
+    width, height = image.get_size()
+    tile = pygame.Surface((width * 2, height))
+    tile.blit(image, (0, 0))
+    tile.blit(pygame.transform.flip(image, True, False), (width, 0))
+    return tile.convert()
+
+
+def star_tile(size, count: int, color, radius: int, rng):
+    # colour-keyed and RLE encoded, blitting it only touches the star pixels
+    tile = pygame.Surface(size)
+    tile.fill(TRANSPARENT)
+    width, height = size
+    for _ in range(count):
+        pygame.draw.circle(tile, color, (rng.randrange(width), rng.randrange(height)), radius)
+    tile = tile.convert()
+    tile.set_colorkey(TRANSPARENT, pygame.RLEACCEL)
+    return tile
+
+
+class Starfield:
+    # parallax background, every layer drawn with a few blits whatever the number of stars
+
+    def __init__(self, layers):
+        self.layers = layers
+        self.seconds = 0.0
+
+    @property
+    def scrolling(self) -> bool:
+        return any(layer.velocity[0] or layer.velocity[1] for layer in self.layers)
+
+    def scroll_to(self, seconds: float):
+        self.seconds = seconds
+
+    def draw(self, win):
+        seconds = self.seconds
+        for layer in self.layers:
+            layer.draw(win, seconds)
+
+
+def backdrop(size=SCREEN_SIZE, parallax: bool = True, seed: int = 0):
+    # the scrolling Starfield, or background1.png as a still Surface the dirty-rect renderer can restore areas from
+    if not parallax:
+        return assets.image(BASE_IMAGE, alpha=False)
+    return build(size, seed)
+
+
+def build(size=SCREEN_SIZE, seed: int = 0, star_layers=STAR_LAYERS, base_speed: float = BASE_SPEED):
+    # needs the display, the tiles are converted to its format
+    rng = random.Random(seed)
+    base = assets.image(BASE_IMAGE, alpha=False)
+    layers = [Layer(mirrored_tile(base), (base_speed, 0.0))]
+    for count, speed, color, radius in star_layers:
+        layers.append(Layer(star_tile(size, count, color, radius, rng), (speed, 0.0)))
+    return Starfield(layers)
@@ -0,0 +1,73 @@
+"""EntityStore benchmark: one vectorized step (borders, integration, enemy steering) over N enemy rows, next to
+the same enemies as plain objects stepped one by one the way the game does.
+
+Run from the repository root: python -m benchmarks.entity_store_bench --enemies 10000
+"""
+import argparse
+import os
+import random
+import time
+
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+os.environ.setdefault('SDL_AUDIODRIVER', 'dummy')
+
+import entity_store  # noqa: E402
+import timing  # noqa: E402
+from test import Enemy, TICK_RATE, Vector2  # noqa: E402
+
+ENEMIES = (1000, 10000)
+STEPS = 120
+SEED = 1
+
+
+def spawn(count: int, seed: int = SEED):
+    rng = random.Random(seed)
+    # the numpy generator is seeded from the game's rng, so a seed still decides the whole session
+    store = entity_store.EntityStore(Vector2, count, seed=rng.getrandbits(64))
+    for _ in range(count):
+        store.spawn(Enemy, rng)
+    objects = [Enemy(rng) for _ in range(count)]
+    return store, objects
+
+
+def step_objects(objects, dt: float):
+    # the per-entity order of the ECS systems: borders, movement, steering
+    for enemy in objects:
+        enemy.borders()
+    for enemy in objects:
+        enemy.update(dt)
+    for enemy in objects:
+        enemy.move(dt)
+
+
+def measure(step, steps: int) -> dict:
+    samples = []
+    for _ in range(steps):
+        start = time.perf_counter()
+        step()
+        samples.append(time.perf_counter() - start)
+    return timing.percentiles(samples)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--enemies', type=int, action='append', help="row count to run, repeatable")
+    parser.add_argument('--steps', type=int, default=STEPS)
+    args = parser.parse_args()
+    if entity_store.numpy is None:
+        parser.exit(1, 'EntityStore needs numpy\n')
+    import pygame
+    pygame.display.set_mode((800, 600))
+    dt = 1.0 / TICK_RATE
+    print(f'{"enemies":>8}{"store p50 ms":>14}{"store p99 ms":>14}{"objects p50 ms":>16}{"speedup":>9}')
+    for count in args.enemies or ENEMIES:
+        store, objects = spawn(count)
+        vectorized = measure(lambda: store.step(dt), args.steps)
+        looped = measure(lambda: step_objects(objects, dt), args.steps)
+        print(f'{count:>8}{vectorized["p50"] * 1000:>14.3f}{vectorized["p99"] * 1000:>14.3f}'
+              f'{looped["p50"] * 1000:>16.3f}{looped["p50"] / vectorized["p50"]:>8.1f}x')
+    pygame.quit()
+
+
+if __name__ == '__main__':
+    main()
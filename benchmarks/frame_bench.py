@@ -0,0 +1,282 @@
+"""Frame-time regression benchmark: fixed scenarios through the game's simulation, HUD and renderer on the
+dummy SDL driver, one fresh process per scenario.
+
+Run from the repository root:
+    python -m benchmarks.frame_bench run --out bench.json
+    python -m benchmarks.frame_bench compare baseline.json bench.json --threshold 0.10
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import resource
+import statistics
+import subprocess
+import sys
+import time
+import tracemalloc
+
+import timing
+
+FRAMES = 600
+WARMUP_FRAMES = 60
+# frames run a second time under tracemalloc, tracing slows them down too much to time them as well
+ALLOC_FRAMES = 120
+BULLETS = 1000
+PARTICLES = 4000
+SEED = 1
+SCENARIOS = ('idle', 'enemies_3', 'enemies_100', 'bullets_1000', 'hud_heavy', 'particles_4000')
+STATS = ('p50', 'p95', 'p99', 'max', 'mean')
+
+
+def summarize(samples) -> dict:
+    # timing.percentiles plus the mean
+    summary = timing.percentiles(samples)
+    summary['mean'] = statistics.fmean(samples)
+    return summary
+
+
+def enemy_waves(count: int) -> dict:
+    # a single wave that keeps `count` enemies alive, nobody shoots them in these scenarios
+    import director
+    return {
+        'max_enemies': max(count, 1),
+        'min_enemies': count,
+        'waves': [director.Wave('bench', count, count, 0.0)],
+    }
+
+
+class Scenario:
+    # one game plus everything main() draws it with, stepped exactly once per frame
+
+    def __init__(self, name: str, parallax: bool = True):
+        import assets
+        import background
+        import hud
+        import pool
+        import profiler
+        import renderer
+        import test as game_module
+        self.name = name
+        self.parallax = parallax
+        self.game_module = game_module
+        self.win = game_module.pygame.display.set_mode((800, 600))
+        assets.cache.convert()
+        font = assets.font('Assets/superstarfont.ttf', 20)
+        self.hud = hud.Hud(font, assets.font('Assets/superstarfont.ttf', 80))
+        self.overlay_font = assets.font(None, 18)
+        self.profiler = profiler.FrameProfiler(window=FRAMES, keep_frames=True)
+        self.backdrop = background.backdrop(self.win.get_size(), parallax, seed=SEED)
+        self.screen = renderer.Renderer(self.win, self.backdrop, game_module.RENDER_MODE)
+        self.screen.profiler = self.profiler
+        self.rng = random.Random(SEED)
+        waves = None
+        # the director spawns one enemy per tick, the warmup runs until all of them are in play
+        self.warmup_frames = WARMUP_FRAMES
+        if name == 'idle':
+            waves = enemy_waves(0)
+        elif name == 'enemies_3':
+            waves = enemy_waves(3)
+            self.warmup_frames += 3
+        elif name == 'enemies_100':
+            waves = enemy_waves(100)
+            self.warmup_frames += 100
+        self.game = game_module.Game(seed=SEED, waves=waves)
+        self.game.profiler = self.profiler
+        self.game.hud = self.hud
+        if name == 'bullets_1000':
+            rng = self.game.rng
+            self.game.bullets = pool.BulletPool(lambda: game_module.Bullet(0, 0, rng), BULLETS)
+        if name == 'hud_heavy':
+            self.profiler.toggle_overlay()
+        if name == 'particles_4000':
+            import particles
+            self.game.particles = particles.ParticleSystem(PARTICLES, seed=SEED)
+        self.hud.update(self.game.ship, self.game.cooldown, self.game.game_over)
+
+    def before_step(self):
+        game = self.game
+        if self.name == 'bullets_1000':
+            # keeps every bullet in flight, spread over the screen so the grid stays representative
+            bullets = game.bullets
+            while len(bullets.active) < BULLETS:
+                bullet = bullets.acquire()
+                bullet.fire(self.rng.uniform(10, 730), self.rng.uniform(10, 530))
+                game.add_bullet(bullet)
+        elif self.name == 'particles_4000':
+            # a fresh explosion somewhere every tick keeps the buffer full, the oldest particles get overwritten
+            game.particles.explode(self.rng.uniform(50, 750), self.rng.uniform(50, 550))
+            game.particles.emit(0, self.rng.uniform(50, 750), self.rng.uniform(50, 550), PARTICLES // 40, 140.0, 1.5)
+        elif self.name == 'hud_heavy':
+            # every label changes every frame and the game over overlay is up, nothing comes from the text cache
+            ship = game.ship
+            ship.kills += 1
+            ship.TELEPORT_POINTS = game.tick % 10
+            ship.LIVES = 1 + game.tick % 3
+            game.cooldown = not game.cooldown
+            game.game_over = True
+            game.game_over_tick = game.tick
+
+    def frame(self):
+        pygame = self.game_module.pygame
+        profiler = self.profiler
+        profiler.begin_frame()
+        pygame.event.pump()
+        profiler.mark('events')
+        self.before_step()
+        self.game.step()
+        if self.parallax:
+            self.backdrop.scroll_to(self.game.render_time())
+        self.game.draw(self.screen, self.hud)
+        profiler.draw_overlay(self.screen, self.overlay_font, self.hud.cache)
+        self.screen.present()
+        profiler.end_frame()
+
+
+def run_scenario(name: str, frames: int = FRAMES, parallax: bool = True) -> dict:
+    import pygame
+    pygame.init()
+    scenario = Scenario(name, parallax)
+    for _ in range(scenario.warmup_frames):
+        scenario.frame()
+    scenario.profiler.frames.clear()
+    scenario.screen.background_report(1.0)
+    start = time.perf_counter()
+    for _ in range(frames):
+        scenario.frame()
+    elapsed = time.perf_counter() - start
+    background_ms, _ = scenario.screen.background_report(1.0)
+    records = scenario.profiler.frames
+    frame_ms = {stat: value * 1000 for stat, value in summarize([record['frame'] for record in records]).items()}
+    phases = {}
+    for phase in records[0]:
+        if phase == 'frame':
+            continue
+        phases[phase] = {stat: value * 1000 for stat, value in summarize([record[phase] for record in records]).items()}
+    # the traced frames stay out of the timings above
+    scenario.profiler.keep_frames = False
+    allocated = []
+    tracemalloc.start()
+    for _ in range(ALLOC_FRAMES):
+        before = tracemalloc.get_traced_memory()[0]
+        tracemalloc.reset_peak()
+        scenario.frame()
+        allocated.append(tracemalloc.get_traced_memory()[1] - before)
+    tracemalloc.stop()
+    game = scenario.game
+    pygame.quit()
+    return {
+        'frames': frames,
+        'fps': frames / elapsed,
+        'frame_ms': frame_ms,
+        'phase_ms': phases,
+        'background_ms': background_ms,
+        # the most memory a frame held on top of what was live when it started
+        'alloc_bytes_per_frame': summarize(allocated),
+        'peak_rss_kb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+        'enemies': len(game.enemies),
+        'bullets': len(game.bullets.active),
+        'particles': len(game.particles) if game.particles is not None else 0,
+    }
+
+
+def run(scenarios=SCENARIOS, frames: int = FRAMES, parallax: bool = True) -> dict:
+    # every scenario in its own interpreter, so peak RSS and caches belong to that scenario alone
+    env = dict(os.environ, SDL_VIDEODRIVER='dummy', SDL_AUDIODRIVER='dummy', PYGAME_HIDE_SUPPORT_PROMPT='1')
+    results = {}
+    for name in scenarios:
+        command = [sys.executable, '-m', 'benchmarks.frame_bench', 'child', name, '--frames', str(frames)]
+        if not parallax:
+            command.append('--static-background')
+        output = subprocess.run(command, env=env, capture_output=True, text=True, check=True)
+        results[name] = json.loads(output.stdout.strip().splitlines()[-1])
+    import pygame
+    return {
+        'python': platform.python_version(),
+        'pygame': pygame.version.ver,
+        'machine': platform.machine(),
+        'parallax': parallax,
+        'scenarios': results,
+    }
+
+
+def compare(baseline: dict, current: dict, threshold: float, stat: str = 'p50'):
+    # (report lines, names of the scenarios whose frame time grew by more than threshold)
+    # results from before the --static-background option always drew the parallax starfield
+    if baseline.get('parallax', True) != current.get('parallax', True):
+        raise ValueError("one run draws the parallax background and the other does not, their frame times differ "
+                         "for that alone")
+    lines = [f'{"scenario":<16}{"baseline ms":>13}{"current ms":>12}{"change":>9}']
+    regressed = []
+    for name, result in current['scenarios'].items():
+        old = baseline['scenarios'].get(name)
+        if old is None:
+            lines.append(f'{name:<16}{"-":>13}{result["frame_ms"][stat]:>12.3f}{"new":>9}')
+            continue
+        before = old['frame_ms'][stat]
+        after = result['frame_ms'][stat]
+        change = after / before - 1 if before > 0 else 0.0
+        flag = ''
+        if change > threshold:
+            regressed.append(name)
+            flag = '  REGRESSED'
+        lines.append(f'{name:<16}{before:>13.3f}{after:>12.3f}{change:>+9.1%}{flag}')
+        for phase, stats in result['phase_ms'].items():
+            old_phase = old['phase_ms'].get(phase)
+            if old_phase is not None and old_phase[stat] > 0.01:
+                lines.append(f'  {phase:<14}{old_phase[stat]:>13.3f}{stats[stat]:>12.3f}'
+                             f'{stats[stat] / old_phase[stat] - 1:>+9.1%}')
+    return lines, regressed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    commands = parser.add_subparsers(dest='command', required=True)
+    run_parser = commands.add_parser('run', help="run the scenarios and write their results as JSON")
+    run_parser.add_argument('--out', metavar='PATH')
+    run_parser.add_argument('--frames', type=int, default=FRAMES)
+    run_parser.add_argument('--scenario', choices=SCENARIOS, action='append')
+    run_parser.add_argument('--static-background', dest='parallax', action='store_false',
+                            help="draw background1.png without the parallax starfield")
+    child = commands.add_parser('child')
+    child.add_argument('scenario', choices=SCENARIOS)
+    child.add_argument('--frames', type=int, default=FRAMES)
+    child.add_argument('--static-background', dest='parallax', action='store_false')
+    compare_parser = commands.add_parser('compare', help="exit 1 when a scenario got slower than the threshold")
+    compare_parser.add_argument('baseline')
+    compare_parser.add_argument('current')
+    compare_parser.add_argument('--threshold', type=float, default=0.10, help="allowed slowdown, 0.10 is 10%%")
+    compare_parser.add_argument('--stat', choices=STATS, default='p50')
+    args = parser.parse_args()
+    if args.command == 'child':
+        print(json.dumps(run_scenario(args.scenario, args.frames, args.parallax)))
+        return 0
+    if args.command == 'run':
+        results = run(args.scenario or SCENARIOS, args.frames, args.parallax)
+        print(f'{"scenario":<16}{"p50 ms":>9}{"p95 ms":>9}{"p99 ms":>9}{"alloc KiB":>11}{"rss MiB":>9}')
+        for name, result in results['scenarios'].items():
+            frame = result['frame_ms']
+            print(f'{name:<16}{frame["p50"]:>9.3f}{frame["p95"]:>9.3f}{frame["p99"]:>9.3f}'
+                  f'{result["alloc_bytes_per_frame"]["p50"] / 1024:>11.1f}{result["peak_rss_kb"] / 1024:>9.1f}')
+        if args.out:
+            with open(args.out, 'w') as file:
+                json.dump(results, file, indent=2)
+        return 0
+    with open(args.baseline) as file:
+        baseline = json.load(file)
+    with open(args.current) as file:
+        current = json.load(file)
+    try:
+        lines, regressed = compare(baseline, current, args.threshold, args.stat)
+    except ValueError as error:
+        parser.error(str(error))
+    print('\n'.join(lines))
+    if regressed:
+        print(f'slower than {args.threshold:.0%} over baseline: {", ".join(regressed)}')
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
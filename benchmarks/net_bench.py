@@ -0,0 +1,53 @@
+"""Co-op networking benchmark: a net.Server and two scripted clients over localhost sockets, per enemy count
+the server's tick and snapshot cost and the bytes each client receives.
+
+Run from the repository root: python -m benchmarks.net_bench --seconds 5
+"""
+import argparse
+import asyncio
+import os
+
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+os.environ.setdefault('SDL_AUDIODRIVER', 'dummy')
+
+import headless  # noqa: E402
+import net  # noqa: E402
+from benchmarks.frame_bench import enemy_waves  # noqa: E402
+from test import Game  # noqa: E402
+
+ENEMY_COUNTS = (3, 30, 100)
+SECONDS = 5.0
+SEED = 1
+
+
+async def session(enemies: int, seconds: float) -> dict:
+    server = net.Server(Game(seed=SEED, players=2, waves=enemy_waves(enemies)), port=0)
+    serving = asyncio.create_task(server.run())
+    await server.listening.wait()
+    clients = [await net.Client.connect(server.host, server.port) for _ in range(2)]
+    received = await asyncio.gather(*(net.run_script(client, headless.SCRIPTS['random'](client.player), seconds)
+                                      for client in clients))
+    await serving
+    report = server.report()
+    report['enemies'] = len(server.game.enemies)
+    report['bytes_per_client_per_sec'] = sum(received) / len(received) / seconds
+    report['bytes_per_snapshot'] = sum(received) / len(received) / max(server.snapshots, 1)
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--seconds', type=float, default=SECONDS)
+    parser.add_argument('--enemies', type=int, action='append', help="enemy count to run, repeatable")
+    args = parser.parse_args()
+    print(f'{"enemies":>8}{"ticks":>7}{"step p50":>10}{"snap p50":>10}{"snap p99":>10}{"B/snapshot":>12}'
+          f'{"B/s client":>12}')
+    for count in args.enemies or ENEMY_COUNTS:
+        report = asyncio.run(session(count, args.seconds))
+        print(f'{report["enemies"]:>8}{report["ticks"]:>7}{report["step_ms_p50"]:>10.3f}'
+              f'{report["snapshot_ms_p50"]:>10.3f}{report["snapshot_ms_p99"]:>10.3f}'
+              f'{report["bytes_per_snapshot"]:>12.0f}{report["bytes_per_client_per_sec"]:>12.0f}')
+
+
+if __name__ == '__main__':
+    main()
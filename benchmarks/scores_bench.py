@@ -0,0 +1,64 @@
+"""High score store benchmark: leaderboard query time over a large sessions table, and what queueing
+telemetry costs the game thread compared to the writer thread committing it.
+
+Run from the repository root: python -m benchmarks.scores_bench --sessions 1000000
+"""
+import argparse
+import os
+import random
+import tempfile
+import time
+
+import scores
+
+SESSIONS = 1000000
+SAMPLES = 100000
+QUERIES = 100
+
+
+def fill(path: str, count: int, seed: int = 0):
+    rng = random.Random(seed)
+    connection = scores.open_store(path)
+    now = time.time()
+    rows = ((now, now, rng.randrange(2 ** 32), int(rng.expovariate(1 / 30)), rng.randrange(4), rng.randrange(20),
+             rng.randrange(36000), 1) for _ in range(count))
+    with connection:
+        connection.executemany('INSERT INTO sessions (started, ended, seed, kills, lives_lost, teleports, ticks, '
+                               'game_over) VALUES (?, ?, ?, ?, ?, ?, ?, ?)', rows)
+    connection.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sessions', type=int, default=SESSIONS)
+    parser.add_argument('--samples', type=int, default=SAMPLES)
+    args = parser.parse_args()
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'scores.db')
+        start = time.perf_counter()
+        fill(path, args.sessions)
+        print(f'filled {args.sessions} sessions in {time.perf_counter() - start:.1f}s')
+        connection = scores.open_store(path)
+        plan = connection.execute('EXPLAIN QUERY PLAN ' + scores.LEADERBOARD, (scores.TOP,)).fetchall()
+        start = time.perf_counter()
+        for _ in range(QUERIES):
+            scores.top(connection)
+        print(f'top {scores.TOP}: {(time.perf_counter() - start) / QUERIES * 1e6:.0f} us  ({plan[-1][-1]})')
+        connection.close()
+        start = time.perf_counter()
+        store = scores.ScoreStore(path)
+        print(f'ScoreStore open with leaderboard: {(time.perf_counter() - start) * 1000:.2f} ms')
+        session = store.begin(1)
+        start = time.perf_counter()
+        for tick in range(args.samples):
+            store.sample(session, 'fps', tick, 60.0)
+        queued = time.perf_counter() - start
+        store.end(session, 99, 3, 0, args.samples, True)
+        store.close()
+        written = time.perf_counter() - start
+        print(f'{args.samples} samples: {queued / args.samples * 1e6:.2f} us each on the game thread, '
+              f'on disk after {written:.2f}s in {store.batches} transactions')
+
+
+if __name__ == '__main__':
+    main()
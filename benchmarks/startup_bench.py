@@ -0,0 +1,41 @@
+"""Startup latency: module import, window/mixer init, assets ready and first frame, in fresh processes.
+
+Run from the repository root: python -m benchmarks.startup_bench [--runs 5]
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+CHILD = """
+import json, time
+start = time.perf_counter()
+import test
+imported = time.perf_counter() - start
+test.main(max_frames=1)
+print(json.dumps(dict(test.STARTUP, imported=imported)))
+"""
+STAGES = ('imported', 'init', 'assets', 'first_frame')
+
+
+def measure_once() -> dict:
+    env = dict(os.environ, SDL_VIDEODRIVER='dummy', SDL_AUDIODRIVER='dummy', PYGAME_HIDE_SUPPORT_PROMPT='1')
+    output = subprocess.run([sys.executable, '-c', CHILD], env=env, capture_output=True, text=True, check=True)
+    return json.loads(output.stdout.strip().splitlines()[-1])
+
+
+def run(runs: int):
+    samples = [measure_once() for _ in range(runs)]
+    print(f'{"stage":<14}{"median ms":>12}{"min ms":>10}{"max ms":>10}')
+    for stage in STAGES:
+        values = [sample[stage] * 1000 for sample in samples]
+        print(f'{stage:<14}{statistics.median(values):>12.1f}{min(values):>10.1f}{max(values):>10.1f}')
+    print('init, assets and first_frame are measured from the start of main(), after the import')
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--runs', type=int, default=5)
+    run(parser.parse_args().runs)
@@ -0,0 +1,80 @@
+"""Vector2 micro-benchmark: ops/sec and bytes per instance, slotted Vector2 against the original class.
+
+Run from the repository root: python -m benchmarks.vector_bench
+"""
+import math
+import os
+import sys
+import timeit
+import tracemalloc
+
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+os.environ.setdefault('SDL_AUDIODRIVER', 'dummy')
+
+from test import Vector2  # noqa: E402
+
+
+class LegacyVector2:
+    # Vector2 as it was before __slots__ and the in-place operations
+
+    def __init__(self, x=0.0, y=0.0):
+        self.x = float(x)
+        self.y = float(y)
+
+    def __add__(self, other):
+        if isinstance(other, float):
+            return LegacyVector2(self.x + other, self.y + other)
+        elif isinstance(other, LegacyVector2):
+            return LegacyVector2(self.x + other.x, self.y + other.y)
+        else:
+            assert False, "Unknown type"
+
+    def __mul__(self, other):
+        if isinstance(other, float):
+            return LegacyVector2(self.x * other, self.y * other)
+        elif isinstance(other, LegacyVector2):
+            return LegacyVector2(self.x * other.x, self.y * other.y)
+        else:
+            assert False, "Unknown type"
+
+    def length(self) -> float:
+        return math.sqrt(self.x ** 2 + self.y ** 2)
+
+
+def bytes_per_instance(cls, count: int = 10000) -> float:
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    instances = [cls(i, i) for i in range(count)]
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    size = sum(stat.size_diff for stat in after.compare_to(before, 'filename'))
+    # the list holding the instances is not part of the instance cost
+    size -= sys.getsizeof(instances)
+    return size / count
+
+
+def ops_per_sec(statement: str, namespace: dict, number: int = 200000) -> float:
+    best = min(timeit.repeat(statement, globals=namespace, number=number, repeat=5))
+    return number / best
+
+
+def run():
+    dt = 1 / 60
+    legacy = {'p': LegacyVector2(1, 2), 'v': LegacyVector2(3, 4), 'dt': dt}
+    current = {'p': Vector2(1, 2), 'v': Vector2(3, 4), 'dt': dt}
+    cases = [
+        ('update (p += v * dt)', 'q = p + v * dt', legacy, 'p.scale_add(v, dt)', current),
+        ('add', 'p + v', legacy, 'p + v', current),
+        ('mul scalar', 'p * dt', legacy, 'p * dt', current),
+        ('distance check', 'p.length() < 36', legacy, 'p.length_squared() < 1296', current),
+    ]
+    print(f'{"case":<24}{"legacy ops/s":>16}{"current ops/s":>16}{"speedup":>10}')
+    for name, old_stmt, old_ns, new_stmt, new_ns in cases:
+        old = ops_per_sec(old_stmt, old_ns)
+        new = ops_per_sec(new_stmt, new_ns)
+        print(f'{name:<24}{old:>16,.0f}{new:>16,.0f}{new / old:>9.2f}x')
+    print(f'{"bytes/instance":<24}{bytes_per_instance(LegacyVector2):>16.1f}{bytes_per_instance(Vector2):>16.1f}')
+
+
+if __name__ == '__main__':
+    run()
@@ -0,0 +1,127 @@
+import assets
+
+COLLISION_RADIUS = 36
+CELL_SIZE = 36
+# mask mode tests the sprites as drawn. The pixels of a 64 px sprite turned any way stay within 32 * sqrt(2) of its
+# centre, so two sprites of at most 64 px only overlap while their upright corners are closer than 64 * sqrt(2),
+# and a cell that large puts every such pair in one neighbourhood
+MASK_PAIR_RADIUS = 91
+MASK_CELL_SIZE = MASK_PAIR_RADIUS
+
+# narrowphase: distance between the sprite corners, or per-pixel overlap of the sprite masks
+RADIUS = 'radius'
+MASK = 'mask'
+
+BULLET_ENEMY = ('bullet', 'enemy')
+SHIP_ENEMY = ('ship', 'enemy')
+ENEMY_ENEMY = ('enemy', 'enemy')
+SHIP_ITEM = ('ship', 'item')
+PAIR_KINDS = (BULLET_ENEMY, SHIP_ENEMY, ENEMY_ENEMY, SHIP_ITEM)
+
+# the cell itself plus the four "forward" neighbours, so every neighbouring cell pair of one kind is visited once
+_FORWARD = ((1, 0), (-1, 1), (0, 1), (1, 1))
+# the cell and all eight around it, for pairs of two different kinds
+_AROUND = ((0, 0), (1, 0), (-1, 0), (0, 1), (0, -1), (1, 1), (-1, 1), (1, -1), (-1, -1))
+
+
+def within(a, b, radius: float = COLLISION_RADIUS) -> bool:
+    dx = a.position.x - b.position.x
+    dy = a.position.y - b.position.y
+    return dx * dx + dy * dy < radius * radius
+
+
+def overlap(a, b) -> bool:
+    # box test on the sprites as drawn first, the masks only for the pairs whose boxes intersect
+    a_img, ax, ay = a.drawn_sprite()
+    b_img, bx, by = b.drawn_sprite()
+    aw, ah = a_img.get_size()
+    bw, bh = b_img.get_size()
+    if ax >= bx + bw or bx >= ax + aw or ay >= by + bh or by >= ay + ah:
+        return False
+    return assets.mask(a_img).overlap(assets.mask(b_img), (bx - ax, by - ay)) is not None
+
+
+def touching(a, b, mode: str = RADIUS) -> bool:
+    if mode is MASK:
+        return overlap(a, b)
+    # the module value at call time, so a sweep can change the radius without rebuilding entities
+    return within(a, b, COLLISION_RADIUS)
+
+
+class SpatialHash:
+    # one grid per entity kind, so only the kind combinations in PAIR_KINDS are ever looked at
+
+    def __init__(self, cell_size: float = CELL_SIZE):
+        self.cell_size = cell_size
+        self.grids = {}
+        self.checked = 0
+
+    def build(self, *groups):
+        grids = {}
+        size = self.cell_size
+        for entities in groups:
+            for entity in entities:
+                kind = getattr(entity, 'KIND', None)
+                if kind is None:
+                    continue
+                cells = grids.get(kind)
+                if cells is None:
+                    cells = grids[kind] = {}
+                key = (int(entity.position.x // size), int(entity.position.y // size))
+                bucket = cells.get(key)
+                if bucket is None:
+                    cells[key] = [entity]
+                else:
+                    bucket.append(entity)
+        self.grids = grids
+        return self
+
+    def pairs(self, radius: float = COLLISION_RADIUS):
+        # yields (tag, a, b) for every pair of the PAIR_KINDS closer than radius, a.KIND == tag[0]
+        # radius=None skips the distance test and yields every candidate sharing a neighbourhood
+        self.checked = 0
+        grids = self.grids
+        for tag in PAIR_KINDS:
+            first = grids.get(tag[0])
+            second = grids.get(tag[1])
+            if first is None or second is None:
+                continue
+            if first is second:
+                yield from self._same_kind(tag, first, radius)
+            elif len(first) <= len(second):
+                yield from self._two_kinds(tag, first, second, radius, False)
+            else:
+                # walks the kind with fewer occupied cells, e.g. the enemies rather than a thousand bullets
+                yield from self._two_kinds(tag, second, first, radius, True)
+
+    def _same_kind(self, tag, cells, radius):
+        for (cx, cy), bucket in cells.items():
+            count = len(bucket)
+            for i in range(count):
+                a = bucket[i]
+                for j in range(i + 1, count):
+                    if self._near(a, bucket[j], radius):
+                        yield tag, a, bucket[j]
+            for dx, dy in _FORWARD:
+                other = cells.get((cx + dx, cy + dy))
+                if other is None:
+                    continue
+                for a in bucket:
+                    for b in other:
+                        if self._near(a, b, radius):
+                            yield tag, a, b
+
+    def _two_kinds(self, tag, cells, others, radius, swap: bool):
+        for (cx, cy), bucket in cells.items():
+            for dx, dy in _AROUND:
+                other = others.get((cx + dx, cy + dy))
+                if other is None:
+                    continue
+                for a in bucket:
+                    for b in other:
+                        if self._near(a, b, radius):
+                            yield (tag, b, a) if swap else (tag, a, b)
+
+    def _near(self, a, b, radius) -> bool:
+        self.checked += 1
+        return radius is None or within(a, b, radius)
@@ -0,0 +1,78 @@
+"""Packs the small sprites in Assets/ into one atlas image plus a JSON index.
+
+    python build_atlas.py
+
+Sprites larger than MAX_SPRITE_SIZE on either side (backgrounds, the window icon) stay separate files.
+"""
+import glob
+import json
+import os
+
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+
+import pygame  # noqa: E402
+
+from assets import ATLAS_IMAGE, ATLAS_INDEX  # noqa: E402
+
+ASSETS_DIR = "Assets"
+ATLAS_WIDTH = 512
+MAX_SPRITE_SIZE = 256
+PADDING = 1
+
+
+def sprite_paths(assets_dir: str = ASSETS_DIR):
+    paths = sorted(glob.glob(os.path.join(assets_dir, '*.png')))
+    return [path.replace(os.sep, '/') for path in paths if not path.endswith(os.path.basename(ATLAS_IMAGE))]
+
+
+def pack(sizes: dict, width: int = ATLAS_WIDTH, padding: int = PADDING):
+    # shelf packing, tallest first: returns {name: (x, y, w, h)} and the atlas height
+    placed = {}
+    x = y = shelf = 0
+    for name, (w, h) in sorted(sizes.items(), key=lambda item: (-item[1][1], -item[1][0], item[0])):
+        if w > width:
+            raise ValueError(f"{name} is wider than the atlas")
+        if x + w > width:
+            x = 0
+            y += shelf + padding
+            shelf = 0
+        placed[name] = (x, y, w, h)
+        x += w + padding
+        shelf = max(shelf, h)
+    return placed, y + shelf
+
+
+def build(assets_dir: str = ASSETS_DIR, image_path: str = ATLAS_IMAGE, index_path: str = ATLAS_INDEX):
+    # writes the atlas and its index, returns the asset files a build still has to ship next to it
+    pygame.init()
+    images = {}
+    separate = []
+    for path in sprite_paths(assets_dir):
+        image = pygame.image.load(path)
+        if image.get_width() > MAX_SPRITE_SIZE or image.get_height() > MAX_SPRITE_SIZE:
+            separate.append(path)
+        else:
+            images[path] = image
+    placed, height = pack({path: image.get_size() for path, image in images.items()})
+    atlas = pygame.Surface((ATLAS_WIDTH, max(height, 1)), pygame.SRCALPHA)
+    atlas.fill((0, 0, 0, 0))
+    for path, (x, y, w, h) in placed.items():
+        atlas.blit(images[path], (x, y))
+    pygame.image.save(atlas, image_path)
+    index = {
+        'image': image_path.replace(os.sep, '/'),
+        'sprites': {path: list(rect) for path, rect in sorted(placed.items())},
+    }
+    with open(index_path, 'w') as file:
+        json.dump(index, file)
+    others = [path.replace(os.sep, '/') for path in sorted(glob.glob(os.path.join(assets_dir, '*')))
+              if not path.endswith('.png')]
+    others = [path for path in others if path != index_path.replace(os.sep, '/')]
+    return [image_path, index_path] + separate + others
+
+
+if __name__ == '__main__':
+    files = build()
+    with open(ATLAS_INDEX) as index_file:
+        count = len(json.load(index_file)['sprites'])
+    print(f'{count} sprites -> {ATLAS_IMAGE}, ship alongside: {", ".join(files[2:])}')
@@ -0,0 +1,128 @@
+import logging
+
+import pygame
+
+log = logging.getLogger(__name__)
+
+LEFT = 'left'
+RIGHT = 'right'
+UP = 'up'
+DOWN = 'down'
+TELEPORT = 'teleport'
+FIRE = 'fire'
+FLOOR = 'floor'
+ACTIONS = (LEFT, RIGHT, UP, DOWN, TELEPORT, FIRE, FLOOR)
+
+DEFAULT_BINDINGS = {
+    LEFT: (pygame.K_LEFT,),
+    RIGHT: (pygame.K_RIGHT,),
+    UP: (pygame.K_UP,),
+    DOWN: (pygame.K_DOWN,),
+    TELEPORT: (pygame.K_SPACE,),
+    FIRE: (pygame.K_LALT,),
+    FLOOR: (pygame.K_F12,),
+}
+
+# the window contents were lost or uncovered, a dirty-rect renderer has to redraw the whole screen
+EXPOSE_EVENTS = (pygame.VIDEOEXPOSE, pygame.WINDOWEXPOSED, pygame.WINDOWSHOWN, pygame.WINDOWRESTORED)
+# everything else (mouse motion, other window and joystick events) is dropped by SDL before it reaches the queue
+ALLOWED_EVENTS = (pygame.QUIT, pygame.KEYDOWN, pygame.KEYUP) + EXPOSE_EVENTS
+
+
+def allow_events(events=ALLOWED_EVENTS):
+    pygame.event.set_blocked(None)
+    pygame.event.set_allowed(list(events))
+
+
+def action_mask(pressed, actions=ACTIONS) -> int:
+    # bit i set when actions[i] is pressed, for anything that stores or sends input compactly
+    mask = 0
+    for bit, action in enumerate(actions):
+        if action in pressed:
+            mask |= 1 << bit
+    return mask
+
+
+def mask_actions(mask: int, actions=ACTIONS) -> frozenset:
+    return frozenset(action for bit, action in enumerate(actions) if mask >> bit & 1)
+
+
+class InputState:
+    # the actions held during one tick, and what changed since the tick before
+
+    __slots__ = ('pressed', 'just_pressed', 'just_released')
+
+    def __init__(self, pressed=frozenset(), just_pressed=frozenset(), just_released=frozenset()):
+        self.pressed = pressed
+        self.just_pressed = just_pressed
+        self.just_released = just_released
+
+    def next(self, pressed):
+        # the state of the following tick, edges are derived so a replay of pressed sets rebuilds them
+        pressed = frozenset(pressed)
+        return InputState(pressed, pressed - self.pressed, self.pressed - pressed)
+
+    def __repr__(self):
+        return f'InputState(pressed={sorted(self.pressed)}, just_pressed={sorted(self.just_pressed)})'
+
+
+class Debounce:
+    # lets an action through at most once every `ticks` ticks
+
+    def __init__(self, ticks: int):
+        self.ticks = ticks
+        self.next_tick = 0
+
+    def ready(self, tick: int) -> bool:
+        if tick < self.next_tick:
+            return False
+        self.next_tick = tick + self.ticks
+        return True
+
+
+class Controls:
+    # turns key events into the set of actions pressed during a tick
+
+    def __init__(self, bindings: dict = None):
+        self.keys = {}
+        for action, keys in (bindings or DEFAULT_BINDINGS).items():
+            self.bind(action, *keys)
+        self.held = set()
+        # pressed and released again between two ticks, still counts as pressed for one tick
+        self.tapped = set()
+
+    def bind(self, action: str, *keys):
+        # replaces the keys of action, a key bound elsewhere moves over to action
+        if action not in ACTIONS:
+            raise ValueError(f"unknown action {action!r}")
+        for key, bound in list(self.keys.items()):
+            if bound == action or key in keys:
+                del self.keys[key]
+        for key in keys:
+            self.keys[key] = action
+
+    def bind_names(self, names: dict):
+        # {'fire': 'left ctrl'}, key names as pygame.key.name spells them
+        for action, name in names.items():
+            self.bind(action, pygame.key.key_code(name))
+
+    def handle(self, event) -> bool:
+        # True when the event was a bound key
+        if event.type != pygame.KEYDOWN and event.type != pygame.KEYUP:
+            return False
+        action = self.keys.get(event.key)
+        if action is None:
+            return False
+        if event.type == pygame.KEYDOWN:
+            self.held.add(action)
+            self.tapped.add(action)
+        else:
+            self.held.discard(action)
+        log.debug('%s %s', pygame.event.event_name(event.type), action)
+        return True
+
+    def poll(self) -> frozenset:
+        # the actions for the next tick
+        pressed = frozenset(self.held | self.tapped)
+        self.tapped.clear()
+        return pressed
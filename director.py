@@ -0,0 +1,117 @@
+import json
+
+import pool
+
+WAVES_PATH = "Assets/waves.json"
+# how quickly the measured frame time follows new samples
+FRAME_TIME_SMOOTHING = 0.05
+# frames between two changes of the enemy cap
+BUDGET_ADJUST_FRAMES = 15
+
+
+class Wave:
+
+    def __init__(self, name: str, count: int, alive: int, spawn_interval: float, sprites=None, thrust=None,
+                 dy=None, max_thrust=None):
+        self.name = name
+        self.count = count
+        self.alive = alive
+        self.spawn_interval = spawn_interval
+        self.sprites = sprites
+        self.thrust = thrust
+        self.dy = dy
+        self.max_thrust = max_thrust
+
+    @classmethod
+    def from_dict(cls, data: dict):
+        return cls(data.get('name', 'wave'), int(data['count']), int(data.get('alive', data['count'])),
+                   float(data.get('spawn_interval', 0.0)), data.get('sprites'), data.get('thrust'),
+                   data.get('dy'), data.get('max_thrust'))
+
+    def grown(self, extra: int):
+        # the same wave with more enemies, used once the list of waves runs out
+        return Wave(self.name, self.count + extra, self.alive + extra, self.spawn_interval, self.sprites,
+                    self.thrust, self.dy, self.max_thrust)
+
+
+def load_config(path: str = WAVES_PATH) -> dict:
+    with open(path) as file:
+        config = json.load(file)
+    config['waves'] = [Wave.from_dict(wave) for wave in config['waves']]
+    if not config['waves']:
+        raise ValueError(f"{path} defines no waves")
+    return config
+
+
+class SpawnDirector:
+    # walks through the waves, handing out pooled enemies and taking killed ones back
+
+    def __init__(self, config: dict, enemy_factory, tick_rate: int):
+        self.waves = config['waves']
+        self.tick_rate = tick_rate
+        self.repeat_growth = config.get('repeat_growth', 0)
+        self.pool = pool.Pool(enemy_factory, config.get('max_enemies', 256))
+        self.frame_budget = config.get('frame_budget_ms', 12.0) / 1000.0
+        self.min_enemies = config.get('min_enemies', 1)
+        # enemy cap; observe_frame proposes changes from the measured frame time, Game.step applies them
+        # at a tick so a recording can carry them as input
+        self.budget = self.pool.capacity
+        self.frame_time = None
+        self.observed = 0
+        self.wave_number = 0
+        self.wave = self.waves[0]
+        self.spawned = 0
+        self.next_spawn_tick = 0
+
+    @property
+    def active(self):
+        return self.pool.active
+
+    def start_wave(self, number: int, tick: int):
+        self.wave_number = number
+        if number < len(self.waves):
+            self.wave = self.waves[number]
+        else:
+            self.wave = self.waves[-1].grown(self.repeat_growth * (number - len(self.waves) + 1))
+        self.spawned = 0
+        self.next_spawn_tick = tick
+
+    def update(self, tick: int):
+        # spawns at most one enemy per tick, returns it or None
+        wave = self.wave
+        active = len(self.pool.active)
+        if self.spawned >= wave.count:
+            if not active:
+                self.start_wave(self.wave_number + 1, tick)
+            return None
+        if tick < self.next_spawn_tick or active >= min(wave.alive, self.budget):
+            return None
+        enemy = self.pool.acquire()
+        if enemy is None:
+            return None
+        enemy.configure(wave.sprites, wave.thrust, wave.dy, wave.max_thrust)
+        enemy.reset()
+        self.spawned += 1
+        self.next_spawn_tick = tick + int(wave.spawn_interval * self.tick_rate)
+        return enemy
+
+    def retire(self, enemy):
+        self.pool.release(enemy)
+
+    def observe_frame(self, seconds: float):
+        # a lower enemy cap while frames run over budget, a higher one once they are cheap again, None for no change
+        if self.frame_time is None:
+            self.frame_time = seconds
+        else:
+            self.frame_time += (seconds - self.frame_time) * FRAME_TIME_SMOOTHING
+        self.observed += 1
+        if self.observed % BUDGET_ADJUST_FRAMES:
+            return None
+        active = len(self.pool.active)
+        if self.frame_time > self.frame_budget:
+            budget = max(self.min_enemies, min(self.budget, active) - 1)
+        elif self.frame_time < self.frame_budget * 0.75 and self.budget < self.pool.capacity:
+            budget = self.budget + 1
+        else:
+            return None
+        return budget if budget != self.budget else None
@@ -0,0 +1,120 @@
+class Interpolated:
+    # remembers last tick's position for render interpolation
+    pass
+
+
+class PlayerInput:
+    # steered by the keyboard, its update() reads the input and integrates
+    pass
+
+
+class Movement:
+    # integrates position from velocity every tick
+    pass
+
+
+class Borders:
+    # wraps or bounces at the screen edges
+    pass
+
+
+class Steering:
+    # random enemy thrust
+    pass
+
+
+class Collider:
+    # goes into the collision grid, pairs are picked by the entity's KIND
+    pass
+
+
+class Lifetime:
+    # removed from play once it leaves the screen
+    pass
+
+
+class Animated:
+    # picks its sprite frame from the simulation time it has been playing
+    pass
+
+
+class World:
+    # component stores keyed by component type; the entities themselves are the keys, the
+    # Entity subclasses stay the place where position, velocity and behaviour live
+
+    def __init__(self):
+        self.stores = {}
+        self.systems = []
+
+    def add(self, entity, *components):
+        # components are marker classes, what the entity does with them lives on the entity
+        for component in components:
+            self.stores.setdefault(component, {})[entity] = None
+        return entity
+
+    def remove(self, entity, *component_types):
+        for component_type in component_types:
+            store = self.stores.get(component_type)
+            if store is not None:
+                store.pop(entity, None)
+
+    def discard(self, entity):
+        for store in self.stores.values():
+            store.pop(entity, None)
+
+    def entities(self, component_type):
+        # live view of the entities owning component_type, copy it before adding or removing during iteration
+        return self.stores.setdefault(component_type, {}).keys()
+
+    def add_system(self, system, phase: str = 'update'):
+        # system(dt) is called once per tick, in the order systems were added; phase names the
+        # profiler phase its time is charged to
+        self.systems.append((system, phase))
+
+    def run(self, dt: float, profiler=None):
+        for system, phase in self.systems:
+            system(dt)
+            if profiler is not None:
+                profiler.mark(phase)
+
+
+def interpolation_system(world: World):
+    def system(dt):
+        for entity in world.entities(Interpolated):
+            entity.save_previous()
+    return system
+
+
+def borders_system(world: World):
+    def system(dt):
+        for entity in world.entities(Borders):
+            entity.borders()
+    return system
+
+
+def input_system(world: World):
+    def system(dt):
+        for entity in world.entities(PlayerInput):
+            entity.update(dt)
+    return system
+
+
+def movement_system(world: World):
+    def system(dt):
+        for entity in world.entities(Movement):
+            entity.update(dt)
+    return system
+
+
+def animation_system(world: World):
+    def system(dt):
+        for entity in world.entities(Animated):
+            entity.animate(dt)
+    return system
+
+
+def steering_system(world: World):
+    def system(dt):
+        for entity in world.entities(Steering):
+            entity.move(dt)
+    return system
@@ -0,0 +1,311 @@
+import math
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+RIGHT_BORDER = 735
+LEFT_BORDER = 2
+BOTTOM_BORDER = 570
+TOP_BORDER = -100
+# Spaceship.borders bounces off the floor and the ceiling instead of wrapping
+SHIP_BOTTOM_BORDER = 535
+SHIP_FLOOR = 530
+SHIP_TOP_BORDER = 0
+SHIP_CEILING = 10
+# kinds following Entity.borders and Spaceship.borders, rows of any other kind are left to their own borders()
+WRAP_KINDS = ('enemy', 'item')
+BOUNCE_KINDS = ('ship',)
+
+
+class ArrayVector:
+    # Vector2 look-alike that reads and writes one row of a store array
+    __slots__ = ('_store', '_field', '_row')
+
+    def __init__(self, store, field: str, row: int):
+        self._store = store
+        self._field = field
+        self._row = row
+
+    @property
+    def x(self) -> float:
+        return float(getattr(self._store, self._field)[self._row, 0])
+
+    @x.setter
+    def x(self, value):
+        getattr(self._store, self._field)[self._row, 0] = value
+
+    @property
+    def y(self) -> float:
+        return float(getattr(self._store, self._field)[self._row, 1])
+
+    @y.setter
+    def y(self, value):
+        getattr(self._store, self._field)[self._row, 1] = value
+
+    def copy(self):
+        return self._store.vector_type(self.x, self.y)
+
+    def __add__(self, other):
+        return self.copy() + other
+
+    def __mul__(self, other):
+        return self.copy() * other
+
+    def iadd(self, other):
+        row = getattr(self._store, self._field)[self._row]
+        if hasattr(other, 'x'):
+            row[0] += other.x
+            row[1] += other.y
+        else:
+            row += other
+        return self
+
+    def imul(self, other):
+        row = getattr(self._store, self._field)[self._row]
+        if hasattr(other, 'x'):
+            row[0] *= other.x
+            row[1] *= other.y
+        else:
+            row *= other
+        return self
+
+    __iadd__ = iadd
+    __imul__ = imul
+
+    def scale_add(self, other, factor: float):
+        row = getattr(self._store, self._field)[self._row]
+        row[0] += other.x * factor
+        row[1] += other.y * factor
+        return self
+
+    def length(self) -> float:
+        return math.hypot(self.x, self.y)
+
+    def length_squared(self) -> float:
+        return self.x * self.x + self.y * self.y
+
+    def __repr__(self):
+        return f'ArrayVector(x={self.x}, y={self.y})'
+
+
+class ArrayEntity:
+    # mixed in front of an Entity subclass so its state lives in an EntityStore row
+
+    @property
+    def position(self):
+        return ArrayVector(self._store, 'pos', self._row)
+
+    @position.setter
+    def position(self, value):
+        self._store.pos[self._row] = (value.x, value.y)
+
+    @property
+    def velocity(self):
+        return ArrayVector(self._store, 'vel', self._row)
+
+    @velocity.setter
+    def velocity(self, value):
+        self._store.vel[self._row] = (value.x, value.y)
+
+    @property
+    def touches(self) -> int:
+        return int(self._store.touches[self._row])
+
+    @touches.setter
+    def touches(self, value):
+        self._store.touches[self._row] = value
+
+    @property
+    def dead(self) -> bool:
+        return bool(self._store.dead[self._row])
+
+    @dead.setter
+    def dead(self, value):
+        self._store.dead[self._row] = value
+
+    @property
+    def RightToLeft(self) -> bool:
+        return bool(self._store.right_to_left[self._row])
+
+    @RightToLeft.setter
+    def RightToLeft(self, value):
+        self._store.right_to_left[self._row] = value
+
+    # per-instance steering, set by Enemy.__init__ and Enemy.configure
+    @property
+    def thrust_range(self):
+        return int(self._store.thrust_range[self._row, 0]), int(self._store.thrust_range[self._row, 1])
+
+    @thrust_range.setter
+    def thrust_range(self, value):
+        self._store.thrust_range[self._row] = value
+
+    @property
+    def dy_range(self):
+        return int(self._store.dy_range[self._row, 0]), int(self._store.dy_range[self._row, 1])
+
+    @dy_range.setter
+    def dy_range(self, value):
+        self._store.dy_range[self._row] = value
+
+    @property
+    def MAX_THRUST(self) -> float:
+        return float(self._store.max_thrust[self._row])
+
+    @MAX_THRUST.setter
+    def MAX_THRUST(self, value):
+        self._store.max_thrust[self._row] = value
+
+
+class EntityStore:
+
+    def __init__(self, vector_type, capacity: int = 64, seed=None):
+        if numpy is None:
+            raise RuntimeError("EntityStore needs numpy")
+        self.vector_type = vector_type
+        # steering draws come from here, pass a seed drawn from Game.rng to keep sessions replayable
+        self.rng = numpy.random.default_rng(seed)
+        self.capacity = 0
+        self.pos = numpy.zeros((0, 2))
+        self.vel = numpy.zeros((0, 2))
+        self.touches = numpy.zeros(0, dtype=numpy.int64)
+        self.dead = numpy.zeros(0, dtype=bool)
+        self.right_to_left = numpy.zeros(0, dtype=bool)
+        self.alive = numpy.zeros(0, dtype=bool)
+        self.steer = numpy.zeros(0, dtype=bool)
+        self.wraps = numpy.zeros(0, dtype=bool)
+        self.bounces = numpy.zeros(0, dtype=bool)
+        self.max_thrust = numpy.zeros(0)
+        self.thrust_range = numpy.zeros((0, 2), dtype=numpy.int64)
+        self.dy_range = numpy.zeros((0, 2), dtype=numpy.int64)
+        self.entities = []
+        self._free = []
+        self._view_classes = {}
+        self._grow(capacity)
+
+    def _grow(self, capacity: int):
+        extra = capacity - self.capacity
+        self.pos = numpy.concatenate((self.pos, numpy.zeros((extra, 2))))
+        self.vel = numpy.concatenate((self.vel, numpy.zeros((extra, 2))))
+        self.touches = numpy.concatenate((self.touches, numpy.zeros(extra, dtype=numpy.int64)))
+        self.dead = numpy.concatenate((self.dead, numpy.zeros(extra, dtype=bool)))
+        self.right_to_left = numpy.concatenate((self.right_to_left, numpy.ones(extra, dtype=bool)))
+        self.alive = numpy.concatenate((self.alive, numpy.zeros(extra, dtype=bool)))
+        self.steer = numpy.concatenate((self.steer, numpy.zeros(extra, dtype=bool)))
+        self.wraps = numpy.concatenate((self.wraps, numpy.zeros(extra, dtype=bool)))
+        self.bounces = numpy.concatenate((self.bounces, numpy.zeros(extra, dtype=bool)))
+        self.max_thrust = numpy.concatenate((self.max_thrust, numpy.zeros(extra)))
+        self.thrust_range = numpy.concatenate((self.thrust_range, numpy.zeros((extra, 2), dtype=numpy.int64)))
+        self.dy_range = numpy.concatenate((self.dy_range, numpy.zeros((extra, 2), dtype=numpy.int64)))
+        self.entities.extend([None] * extra)
+        self._free.extend(range(capacity - 1, self.capacity - 1, -1))
+        self.capacity = capacity
+
+    def view_class(self, cls):
+        view = self._view_classes.get(cls)
+        if view is None:
+            view = type('Array' + cls.__name__, (ArrayEntity, cls), {})
+            self._view_classes[cls] = view
+        return view
+
+    def spawn(self, cls, *args, **kwargs):
+        # builds cls(*args) with its position, velocity and counters stored in this world
+        if not self._free:
+            self._grow(self.capacity * 2)
+        row = self._free.pop()
+        view = self.view_class(cls)
+        entity = view.__new__(view)
+        entity._store = self
+        entity._row = row
+        kind = getattr(cls, 'KIND', None)
+        self.alive[row] = True
+        self.steer[row] = kind == 'enemy'
+        self.wraps[row] = kind in WRAP_KINDS
+        self.bounces[row] = kind in BOUNCE_KINDS
+        self.max_thrust[row] = getattr(cls, 'MAX_THRUST', 0.0)
+        self.thrust_range[row] = getattr(cls, 'THRUST_RANGE', (0, 0))
+        self.dy_range[row] = getattr(cls, 'DY_RANGE', (0, 0))
+        view.__init__(entity, *args, **kwargs)
+        self.entities[row] = entity
+        return entity
+
+    def release(self, entity):
+        row = entity._row
+        self.alive[row] = False
+        self.steer[row] = False
+        self.wraps[row] = False
+        self.bounces[row] = False
+        self.vel[row] = 0.0
+        self.entities[row] = None
+        self._free.append(row)
+
+    def __len__(self):
+        return self.capacity - len(self._free)
+
+    def __iter__(self):
+        return (entity for entity in self.entities if entity is not None)
+
+    def borders(self):
+        # Entity.borders for the WRAP_KINDS rows and Spaceship.borders for the BOUNCE_KINDS rows, one pass each
+        alive = self.alive & (self.wraps | self.bounces)
+        x = self.pos[:, 0].copy()
+        y = self.pos[:, 1].copy()
+        right = alive & (x > RIGHT_BORDER)
+        left = alive & (x < LEFT_BORDER) & ~right
+        side = right | left
+        self.pos[right, 0] = RIGHT_BORDER - 1
+        self.pos[left, 0] = LEFT_BORDER + 1
+        self.vel[side, 0] *= -0.5
+        self.vel[side, 1] = 0.0
+        self.touches[side] += 1
+        self.right_to_left[right] = False
+        self.right_to_left[left] = True
+        wraps = self.wraps
+        bottom = wraps & (y > BOTTOM_BORDER)
+        self.pos[bottom, 1] = -90
+        self.vel[bottom] *= 0.7
+        top = wraps & (y < TOP_BORDER)
+        self.pos[top, 1] = -90
+        self.vel[top, 0] = 0.0
+        bounces = self.bounces
+        floor = bounces & (y > SHIP_BOTTOM_BORDER)
+        self.pos[floor, 1] = SHIP_FLOOR
+        self.touches[floor] += 1
+        ceiling = bounces & (y < SHIP_TOP_BORDER)
+        self.pos[ceiling, 1] = SHIP_CEILING
+        flipped = floor | ceiling
+        self.vel[flipped, 0] = 0.0
+        self.vel[flipped, 1] *= -1.0
+
+    def integrate(self, delta_time: float):
+        alive = self.alive
+        self.pos[alive] += self.vel[alive] * delta_time
+
+    def steer_enemies(self, delta_time: float):
+        # Enemy.move for every enemy row: random side thrust capped at MAX_THRUST, random fall speed,
+        # each drawn from that enemy's own ranges
+        rows = numpy.flatnonzero(self.steer)
+        if not len(rows):
+            return
+        thrust_range = self.thrust_range[rows]
+        dy_range = self.dy_range[rows]
+        thrust = self.rng.integers(thrust_range[:, 0], thrust_range[:, 1] + 1) * delta_time
+        dy = self.rng.integers(dy_range[:, 0], dy_range[:, 1] + 1) * delta_time
+        vx = self.vel[rows, 0]
+        vy = self.vel[rows, 1]
+        new_vx = numpy.where(self.right_to_left[rows], vx + thrust, vx - thrust)
+        too_fast = new_vx * new_vx + vy * vy >= self.max_thrust[rows] ** 2
+        self.vel[rows, 0] = numpy.where(too_fast, vx, new_vx)
+        self.vel[rows, 1] = vy + dy
+
+    def step(self, delta_time: float):
+        # same order as the per-entity loop in main(): borders, update, move
+        self.borders()
+        self.integrate(delta_time)
+        self.steer_enemies(delta_time)
+
+    def blit_sequence(self):
+        pos = self.pos.tolist()
+        return [(entity.img, pos[entity._row]) for entity in self]
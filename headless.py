@@ -0,0 +1,147 @@
+"""Runs game sessions without a window, audio or keyboard.
+
+    python headless.py --sessions 1000 --ticks 3600 --script bot
+"""
+import argparse
+import os
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+# has to happen before pygame is imported anywhere in this process
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+os.environ.setdefault('SDL_AUDIODRIVER', 'dummy')
+
+import controls  # noqa: E402
+import test as game_module  # noqa: E402
+
+# scripts return the set of controls actions held during a tick
+ACTIONS = (controls.LEFT, controls.RIGHT, controls.UP, controls.DOWN, controls.TELEPORT, controls.FIRE)
+DEFAULT_TICKS = 60 * 60
+
+
+def idle_script(seed):
+    def script(tick, game):
+        return frozenset()
+    return script
+
+
+def random_script(seed, hold_ticks: int = 20):
+    # mashes random keys, holding each combination for a third of a second
+    rng = random.Random(seed)
+    held = set()
+
+    def script(tick, game):
+        if tick % hold_ticks == 0:
+            held.clear()
+            for action in ACTIONS:
+                if rng.random() < 0.3:
+                    held.add(action)
+        return held
+    return script
+
+
+def bot_script(seed):
+    # keeps firing and slides under the closest enemy
+    def script(tick, game):
+        ship = game.ship
+        enemies = game.enemies
+        if not enemies:
+            return {controls.FIRE}
+        target = min(enemies, key=lambda enemy: abs(enemy.position.x - ship.position.x))
+        dx = target.position.x - ship.position.x
+        if dx < -8:
+            return {controls.FIRE, controls.LEFT}
+        if dx > 8:
+            return {controls.FIRE, controls.RIGHT}
+        return {controls.FIRE}
+    return script
+
+
+def recorded_script(states):
+    # plays back a list of pressed action sets, one per tick, holding the last one afterwards
+    def script(tick, game):
+        if not states:
+            return frozenset()
+        return states[min(tick, len(states) - 1)]
+    return script
+
+
+SCRIPTS = {
+    'idle': idle_script,
+    'random': random_script,
+    'bot': bot_script,
+}
+
+
+def run_session(seed: int, ticks: int = DEFAULT_TICKS, script='bot', waves: dict = None) -> dict:
+    # plays one seeded session as fast as possible and returns its stats
+    if isinstance(script, str):
+        script = SCRIPTS[script](seed)
+    game = game_module.Game(seed=seed, waves=waves)
+    start = time.perf_counter()
+    while game.running and game.tick < ticks:
+        game.step(script(game.tick, game))
+    elapsed = time.perf_counter() - start
+    ship = game.ship
+    return {
+        'seed': seed,
+        'ticks': game.tick,
+        'kills': ship.kills,
+        'lives_lost': max(game_module.Spaceship.LIVES - ship.LIVES, 0),
+        'survival_seconds': (game.game_over_tick if game.game_over else game.tick) / game.tick_rate,
+        'game_over': game.game_over,
+        'ticks_per_sec': game.tick / elapsed if elapsed > 0 else 0.0,
+    }
+
+
+def _run(args):
+    return run_session(*args)
+
+
+def run_sessions(seeds, ticks: int = DEFAULT_TICKS, script: str = 'bot', workers: int = None):
+    # spreads independent sessions across a process pool, yields stats in seed order
+    jobs = [(seed, ticks, script) for seed in seeds]
+    if workers == 1:
+        for job in jobs:
+            yield _run(job)
+        return
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        for result in pool.map(_run, jobs, chunksize=max(len(jobs) // 64, 1)):
+            yield result
+
+
+def aggregate(results) -> dict:
+    results = list(results)
+    count = len(results)
+    if not count:
+        return {'sessions': 0}
+    return {
+        'sessions': count,
+        'mean_kills': sum(result['kills'] for result in results) / count,
+        'mean_lives_lost': sum(result['lives_lost'] for result in results) / count,
+        'mean_survival_seconds': sum(result['survival_seconds'] for result in results) / count,
+        'game_over_rate': sum(result['game_over'] for result in results) / count,
+        'mean_ticks_per_sec': sum(result['ticks_per_sec'] for result in results) / count,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sessions', type=int, default=100)
+    parser.add_argument('--ticks', type=int, default=DEFAULT_TICKS)
+    parser.add_argument('--seed', type=int, default=0, help="seed of the first session")
+    parser.add_argument('--script', choices=sorted(SCRIPTS), default='bot')
+    parser.add_argument('--workers', type=int, default=None)
+    args = parser.parse_args()
+    start = time.perf_counter()
+    seeds = range(args.seed, args.seed + args.sessions)
+    summary = aggregate(run_sessions(seeds, args.ticks, args.script, args.workers))
+    elapsed = time.perf_counter() - start
+    for key, value in summary.items():
+        print(f'{key}: {value:.2f}' if isinstance(value, float) else f'{key}: {value}')
+    print(f'sessions/minute: {args.sessions / elapsed * 60:.0f}')
+
+
+if __name__ == '__main__':
+    main()
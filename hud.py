@@ -0,0 +1,99 @@
+from collections import OrderedDict
+
+TEXT_COLOR = (200, 0, 244)
+HIGHLIGHT_COLOR = (255, 255, 0)
+LEADERBOARD_POS = (300, 400)
+LEADERBOARD_LINE_HEIGHT = 24
+
+
+class TextCache:
+    # LRU of rendered text surfaces keyed by (font, text, color)
+
+    def __init__(self, capacity: int = 64):
+        self.capacity = capacity
+        self.surfaces = OrderedDict()
+        self.renders = 0
+
+    def render(self, font, text: str, color=TEXT_COLOR):
+        key = (font, text, color)
+        surface = self.surfaces.get(key)
+        if surface is not None:
+            self.surfaces.move_to_end(key)
+            return surface
+        surface = font.render(text, False, color)
+        self.renders += 1
+        self.surfaces[key] = surface
+        if len(self.surfaces) > self.capacity:
+            self.surfaces.popitem(last=False)
+        return surface
+
+
+class Label:
+
+    def __init__(self, cache: TextCache, font, template: str, pos, color=TEXT_COLOR):
+        self.cache = cache
+        self.font = font
+        self.template = template
+        self.pos = pos
+        self.color = color
+        self.value = None
+        self.surface = None
+        self.visible = True
+
+    def set(self, value=None):
+        # only goes to the font when the shown value changed
+        if self.surface is None or value != self.value:
+            self.value = value
+            self.surface = self.cache.render(self.font, self.template.format(value), self.color)
+        return self.surface
+
+    def draw(self, win):
+        if self.visible and self.surface is not None:
+            win.blit(self.surface, self.pos)
+
+
+class Hud:
+
+    def __init__(self, font, big_font, cache: TextCache = None):
+        self.cache = cache if cache is not None else TextCache()
+        self.font = font
+        self.kills = Label(self.cache, font, ' {0} kills', (0, 0))
+        self.lives = Label(self.cache, font, ' {0} Lives', (0, 50))
+        self.teleport = Label(self.cache, font, 'Teleport points {0}', (600, 0))
+        self.cooldown = Label(self.cache, font, 'Life Cooldown On', (300, 300))
+        self.game_over = Label(self.cache, big_font, 'Game Over', (200, 300))
+        self.labels = [self.kills, self.lives, self.teleport, self.cooldown]
+        # shown under Game Over once show_leaderboard() was given the places
+        self.leaderboard = []
+
+    def update(self, ship, cooldown: bool, game_over: bool):
+        self.kills.set(ship.kills)
+        self.lives.set(ship.LIVES)
+        self.teleport.set(ship.TELEPORT_POINTS)
+        self.cooldown.visible = cooldown and not game_over
+        if self.cooldown.visible:
+            self.cooldown.set()
+        self.game_over.visible = game_over
+        if game_over:
+            self.game_over.set()
+
+    def draw(self, win):
+        for label in self.labels:
+            label.draw(win)
+
+    def show_leaderboard(self, entries):
+        # entries are (kills, is this session) best first, rendered once here rather than every frame
+        x, y = LEADERBOARD_POS
+        self.leaderboard = []
+        for place, (kills, current) in enumerate(entries, 1):
+            label = Label(self.cache, self.font, '{0}', (x, y), HIGHLIGHT_COLOR if current else TEXT_COLOR)
+            label.set(f'{place}. {kills} kills')
+            self.leaderboard.append(label)
+            y += LEADERBOARD_LINE_HEIGHT
+
+    def draw_overlay(self, win):
+        # drawn on top of the entities
+        self.game_over.draw(win)
+        if self.game_over.visible:
+            for label in self.leaderboard:
+                label.draw(win)
@@ -0,0 +1,88 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import pygame
+
+import assets
+
+LOADING_COLOR = (200, 0, 244)
+BAR_RECT = pygame.Rect(200, 320, 400, 16)
+
+
+def _load_image(path):
+    return pygame.image.load(path)
+
+
+def _load_sound(path):
+    return pygame.mixer.Sound(path)
+
+
+class AssetLoader:
+    # decodes files on worker threads; results enter the asset cache on the main thread in poll()
+
+    def __init__(self, cache: assets.AssetCache = assets.cache, workers: int = 4):
+        self.cache = cache
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='asset-loader')
+        self.jobs = []
+        self.total = 0
+        self.loaded = 0
+
+    def image(self, path: str, alpha: bool = True):
+        cache = self.cache
+        if cache.ready(path):
+            # already resident or a cheap cut out of the atlas
+            cache.image(path, alpha)
+            return
+        self._submit(_load_image, path, lambda surface: cache.add_image(path, surface, alpha))
+
+    def sound(self, path: str):
+        if path in self.cache.sounds:
+            return
+        self._submit(_load_sound, path, lambda sound: self.cache.add_sound(path, sound))
+
+    def _submit(self, load, path, install):
+        self.jobs.append((self.executor.submit(load, path), install))
+        self.total += 1
+
+    def poll(self) -> float:
+        # installs whatever finished, returns progress between 0 and 1
+        waiting = []
+        for future, install in self.jobs:
+            if future.done():
+                install(future.result())
+                self.loaded += 1
+            else:
+                waiting.append((future, install))
+        self.jobs = waiting
+        return self.loaded / self.total if self.total else 1.0
+
+    def done(self) -> bool:
+        return not self.jobs
+
+    def wait(self):
+        for future, install in self.jobs:
+            install(future.result())
+            self.loaded += 1
+        self.jobs = []
+        self.executor.shutdown(wait=False)
+
+    def run_loading_screen(self, win, font, clock=None):
+        # keeps the window responsive and shows progress until everything is installed
+        clock = clock or pygame.time.Clock()
+        label = font.render("Loading", False, LOADING_COLOR)
+        while True:
+            progress = self.poll()
+            for event in pygame.event.get():
+                if event.type == pygame.QUIT:
+                    self.wait()
+                    return False
+            win.fill((0, 0, 0))
+            win.blit(label, label.get_rect(midbottom=(BAR_RECT.centerx, BAR_RECT.top - 10)))
+            pygame.draw.rect(win, LOADING_COLOR, BAR_RECT, 1)
+            filled = BAR_RECT.copy()
+            filled.w = int(BAR_RECT.w * progress)
+            pygame.draw.rect(win, LOADING_COLOR, filled)
+            pygame.display.update()
+            if self.done():
+                self.executor.shutdown(wait=False)
+                return True
+            clock.tick(60)
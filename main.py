@@ -1,8 +1,15 @@
+import logging
+
 import pygame
 
+log = logging.getLogger(__name__)
+
 # Screen
 pygame.init()
 win = pygame.display.set_mode((800, 600))
+# only the events the loop below reads reach the queue
+pygame.event.set_blocked(None)
+pygame.event.set_allowed([pygame.QUIT, pygame.KEYDOWN])
 # Player
 playerImg = pygame.image.load("Assets/ship.png")
 global playerX, playerY
@@ -44,7 +51,7 @@ while running:
     elif teleport_points == 1:
         win.blit(teleportImg1, (10, 10))
     for event in pygame.event.get():
-        print(event)
+        log.debug('%s', event)
         if event.type == pygame.QUIT:
             running = False
         if event.type == pygame.KEYDOWN:
@@ -0,0 +1,642 @@
+"""Co-op over TCP on localhost: an authoritative headless server and one client process per player.
+
+    python net.py serve --players 2
+    python net.py join
+    python net.py join --script random --seconds 30
+"""
+import argparse
+import asyncio
+import logging
+import os
+import socket
+import struct
+import time
+from collections import deque
+
+import pygame
+
+import controls
+import timing
+
+log = logging.getLogger(__name__)
+
+HOST = '127.0.0.1'
+PORT = 7777
+# one snapshot every this many ticks, 30 a second at the default tick rate
+SNAPSHOT_EVERY_TICKS = 2
+# bytes of entity updates per snapshot and client, whatever does not fit waits for a later snapshot.
+# this is what keeps the bandwidth flat however many enemies are in play
+SNAPSHOT_BUDGET = 600
+# px an entity may drift from where the client extrapolates it before it is worth sending again
+POSITION_TOLERANCE = 1.0
+# fixed point steps of the int16 fields: 1/8 px and 1/4 px/s
+POSITION_SCALE = 8
+VELOCITY_SCALE = 4
+INT16 = 0x7FFF
+# how overdue an update is: new entities and removals go first, then the worst extrapolated positions
+NEW_PRIORITY = 1e6
+SPRITE_PRIORITY = 0.5
+# inputs queued per player, a client that got ahead loses its oldest ones instead of lagging for good
+MAX_QUEUED_INPUTS = 4
+# a client that stops reading is skipped until its socket buffer drains
+MAX_BUFFERED_BYTES = 64 * 1024
+MAX_FRAME_BYTES = 1 << 20
+# the client draws this far behind the newest snapshot so there is nearly always one on either side
+INTERPOLATION_TICKS = 2 * SNAPSHOT_EVERY_TICKS
+# the client's render clock jumps instead of drifting when it is off by more than this
+CLOCK_SNAP_TICKS = 30
+CLOCK_CORRECTION = 0.05
+INTERPOLATION_SNAP = 50
+SNAPSHOTS_KEPT = 8
+CLIENT_FPS = 60
+
+# Entity.KIND by its code on the wire
+KINDS = ('ship', 'enemy', 'bullet', 'item')
+KIND_CODES = {kind: code for code, kind in enumerate(KINDS)}
+
+# message types, the first byte of every frame
+WELCOME = 1
+INPUT = 2
+SPRITES = 3
+SNAPSHOT = 4
+
+# every message is a length prefixed frame
+FRAME = struct.Struct('!I')
+# type, player index, players, tick rate
+WELCOME_MESSAGE = struct.Struct('!BBBH')
+# type, client tick, controls.action_mask of the actions held
+INPUT_MESSAGE = struct.Struct('!BIB')
+# type, number of entries; each entry is SPRITE_ENTRY followed by the utf-8 asset path
+SPRITES_HEADER = struct.Struct('!BH')
+SPRITE_ENTRY = struct.Struct('!HB')
+# type, tick, flags, players, entries; then PLAYER per player and the entries
+SNAPSHOT_HEADER = struct.Struct('!BIBBH')
+# lives, kills, teleport points
+PLAYER = struct.Struct('!bHB')
+# entity id, field bits; then the fields the bits name, in bit order
+ENTRY = struct.Struct('!HB')
+KIND_FIELD = struct.Struct('!B')
+# x, y, vx, vy in fixed point
+MOTION_FIELD = struct.Struct('!hhhh')
+SPRITE_FIELD = struct.Struct('!H')
+
+KIND_BIT = 0x01
+MOTION_BIT = 0x02
+SPRITE_BIT = 0x04
+REMOVED_BIT = 0x80
+COOLDOWN_FLAG = 0x01
+GAME_OVER_FLAG = 0x02
+
+
+def fixed(value: float, scale: int) -> int:
+    return max(-INT16, min(INT16, int(round(value * scale))))
+
+
+def extrapolate(state, tick: int, dt: float):
+    # where a client places an entity `tick` ticks in, from the last motion it was sent.
+    # state is [kind, x, y, vx, vy, sprite, motion tick] in fixed point, the same numbers on both ends
+    elapsed = (tick - state[6]) * dt
+    return (state[1] / POSITION_SCALE + state[3] / VELOCITY_SCALE * elapsed,
+            state[2] / POSITION_SCALE + state[4] / VELOCITY_SCALE * elapsed)
+
+
+def write_frame(writer, payload: bytes) -> int:
+    frame = FRAME.pack(len(payload)) + payload
+    writer.write(frame)
+    return len(frame)
+
+
+async def read_frame(reader) -> bytes:
+    size, = FRAME.unpack(await reader.readexactly(FRAME.size))
+    if size > MAX_FRAME_BYTES:
+        raise ConnectionError(f"frame of {size} bytes")
+    return await reader.readexactly(size)
+
+
+def no_delay(writer):
+    # inputs and snapshots are small and latency bound, Nagle would hold them back
+    sock = writer.get_extra_info('socket')
+    if sock is not None:
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+
+
+class SnapshotEncoder:
+    # one per client: what the client was last sent of each entity and how overdue every update is.
+    # TCP delivers everything in order, so whatever was sent is the client's baseline without any acks
+
+    def __init__(self, dt: float, budget: int = SNAPSHOT_BUDGET):
+        self.dt = dt
+        self.budget = budget
+        self.known = {}
+        self.priority = {}
+
+    def encode(self, tick: int, states: dict, header: bytes, flags: int, players) -> bytes:
+        # states maps entity id -> (kind, x, y, vx, vy, sprite) as the server has it now
+        known = self.known
+        priority = self.priority
+        dt = self.dt
+        for entity_id, state in states.items():
+            old = known.get(entity_id)
+            if old is None or old[0] != state[0]:
+                priority[entity_id] = NEW_PRIORITY
+                continue
+            x, y = extrapolate(old, tick, dt)
+            error = max(abs(x - state[1]), abs(y - state[2]))
+            score = error if error > POSITION_TOLERANCE else 0.0
+            if old[5] != state[5]:
+                score += SPRITE_PRIORITY
+            if score:
+                priority[entity_id] = priority.get(entity_id, 0.0) + score
+            else:
+                priority.pop(entity_id, None)
+        for entity_id in known:
+            if entity_id not in states:
+                priority[entity_id] = NEW_PRIORITY
+        entries = []
+        size = 0
+        for entity_id in sorted(priority, key=priority.__getitem__, reverse=True):
+            state = states.get(entity_id)
+            old = known.get(entity_id)
+            if state is None:
+                if old is not None:
+                    entry = ENTRY.pack(entity_id, REMOVED_BIT)
+                    if size + len(entry) > self.budget:
+                        break
+                    del known[entity_id]
+                    entries.append(entry)
+                    size += len(entry)
+                # gone again before the client ever saw it
+                del priority[entity_id]
+                continue
+            kind, x, y, vx, vy, sprite = state
+            fields = MOTION_BIT
+            if old is None or old[0] != kind:
+                fields |= KIND_BIT | SPRITE_BIT
+            elif old[5] != sprite:
+                fields |= SPRITE_BIT
+            parts = [ENTRY.pack(entity_id, fields)]
+            if fields & KIND_BIT:
+                parts.append(KIND_FIELD.pack(kind))
+            motion = (fixed(x, POSITION_SCALE), fixed(y, POSITION_SCALE), fixed(vx, VELOCITY_SCALE),
+                      fixed(vy, VELOCITY_SCALE))
+            parts.append(MOTION_FIELD.pack(*motion))
+            if fields & SPRITE_BIT:
+                parts.append(SPRITE_FIELD.pack(sprite))
+            entry = b''.join(parts)
+            if size + len(entry) > self.budget:
+                break
+            known[entity_id] = [kind, *motion, sprite, tick]
+            del priority[entity_id]
+            entries.append(entry)
+            size += len(entry)
+        return b''.join([SNAPSHOT_HEADER.pack(SNAPSHOT, tick, flags, len(players), len(entries)), header] + entries)
+
+
+class ClientWorld:
+    # the client's copy of the server's entities, updated from snapshots and extrapolated in between
+
+    def __init__(self, tick_rate: int):
+        self.dt = 1.0 / tick_rate
+        self.known = {}
+        self.sprites = {}
+        self.players = []
+        self.cooldown = False
+        self.game_over = False
+        self.tick = None
+        self.render_tick = None
+        # (tick, {entity id: (kind, x, y, vx, vy, sprite)}) of the latest snapshots
+        self.frames = deque(maxlen=SNAPSHOTS_KEPT)
+
+    def add_sprites(self, payload: bytes):
+        _, count = SPRITES_HEADER.unpack_from(payload)
+        offset = SPRITES_HEADER.size
+        for _ in range(count):
+            index, length = SPRITE_ENTRY.unpack_from(payload, offset)
+            offset += SPRITE_ENTRY.size
+            self.sprites[index] = payload[offset:offset + length].decode()
+            offset += length
+
+    def apply(self, payload: bytes):
+        _, tick, flags, players, count = SNAPSHOT_HEADER.unpack_from(payload)
+        offset = SNAPSHOT_HEADER.size
+        self.players = [PLAYER.unpack_from(payload, offset + index * PLAYER.size) for index in range(players)]
+        offset += players * PLAYER.size
+        self.cooldown = bool(flags & COOLDOWN_FLAG)
+        self.game_over = bool(flags & GAME_OVER_FLAG)
+        known = self.known
+        for _ in range(count):
+            entity_id, fields = ENTRY.unpack_from(payload, offset)
+            offset += ENTRY.size
+            if fields & REMOVED_BIT:
+                known.pop(entity_id, None)
+                continue
+            state = known.get(entity_id)
+            if state is None:
+                state = known[entity_id] = [0, 0, 0, 0, 0, 0, tick]
+            if fields & KIND_BIT:
+                state[0], = KIND_FIELD.unpack_from(payload, offset)
+                offset += KIND_FIELD.size
+            if fields & MOTION_BIT:
+                state[1:5] = MOTION_FIELD.unpack_from(payload, offset)
+                state[6] = tick
+                offset += MOTION_FIELD.size
+            if fields & SPRITE_BIT:
+                state[5], = SPRITE_FIELD.unpack_from(payload, offset)
+                offset += SPRITE_FIELD.size
+        self.tick = tick
+        dt = self.dt
+        frame = {}
+        for entity_id, state in known.items():
+            x, y = extrapolate(state, tick, dt)
+            frame[entity_id] = (state[0], x, y, state[3] / VELOCITY_SCALE, state[4] / VELOCITY_SCALE, state[5])
+        self.frames.append((tick, frame))
+
+    def advance(self, seconds: float):
+        # the tick to draw: INTERPOLATION_TICKS behind the newest snapshot, moving at the pace of the local clock
+        if self.tick is None:
+            return None
+        target = self.tick - INTERPOLATION_TICKS
+        if self.render_tick is None or abs(self.render_tick - target) > CLOCK_SNAP_TICKS:
+            self.render_tick = float(target)
+        else:
+            self.render_tick += seconds / self.dt
+            self.render_tick += (target - self.render_tick) * CLOCK_CORRECTION
+        return self.render_tick
+
+    def interpolated(self, render_tick: float):
+        # (kind, x, y, vx, vy, sprite) of every entity at render_tick, between the snapshots either side of it
+        older = newer = None
+        for frame in self.frames:
+            if frame[0] <= render_tick:
+                older = frame
+            else:
+                newer = frame
+                break
+        if older is None or newer is None:
+            frame = older or newer
+            return list(frame[1].values()) if frame is not None else []
+        alpha = (render_tick - older[0]) / (newer[0] - older[0])
+        before = older[1]
+        result = []
+        for entity_id, state in newer[1].items():
+            old = before.get(entity_id)
+            # teleports and respawns jump instead of sliding across the screen
+            if (old is None or abs(state[1] - old[1]) > INTERPOLATION_SNAP
+                    or abs(state[2] - old[2]) > INTERPOLATION_SNAP):
+                result.append(state)
+                continue
+            result.append((state[0], old[1] + (state[1] - old[1]) * alpha, old[2] + (state[2] - old[2]) * alpha,
+                           state[3], state[4], state[5]))
+        return result
+
+
+class Connection:
+    # the server's end of one player's socket
+
+    def __init__(self, reader, writer, player: int, dt: float, budget: int):
+        self.reader = reader
+        self.writer = writer
+        self.player = player
+        self.encoder = SnapshotEncoder(dt, budget)
+        self.inputs = deque()
+        self.held = frozenset()
+        self.sprites_sent = 0
+        self.bytes_sent = 0
+
+    def next_input(self) -> frozenset:
+        # one queued input per tick; with none queued the player keeps holding what they held
+        if self.inputs:
+            self.held = controls.mask_actions(self.inputs.popleft())
+        return self.held
+
+
+class Server:
+    # runs the game at its tick rate, applies each player's input to their ship and streams snapshots
+
+    def __init__(self, game, host: str = HOST, port: int = PORT, snapshot_every: int = SNAPSHOT_EVERY_TICKS,
+                 budget: int = SNAPSHOT_BUDGET):
+        self.game = game
+        self.host = host
+        self.port = port
+        self.snapshot_every = snapshot_every
+        self.budget = budget
+        self.slots = [None] * len(game.ships)
+        self.ready = asyncio.Event()
+        self.listening = asyncio.Event()
+        self.ids = {}
+        self.sprite_paths = []
+        self.sprite_ids = {}
+        self.step_stats = timing.FrameStats()
+        self.snapshot_stats = timing.FrameStats()
+        self.bytes_sent = 0
+        self.snapshots = 0
+
+    async def handle(self, reader, writer):
+        if None not in self.slots:
+            writer.close()
+            return
+        player = self.slots.index(None)
+        no_delay(writer)
+        connection = Connection(reader, writer, player, self.game.dt, self.budget)
+        self.slots[player] = connection
+        write_frame(writer, WELCOME_MESSAGE.pack(WELCOME, player, len(self.slots), self.game.tick_rate))
+        log.info('player %d joined from %s', player + 1, writer.get_extra_info('peername'))
+        if None not in self.slots:
+            self.ready.set()
+        try:
+            while True:
+                payload = await read_frame(reader)
+                # clients only ever send inputs, anything else is a broken peer and is dropped like one
+                if len(payload) != INPUT_MESSAGE.size or payload[0] != INPUT:
+                    raise ConnectionError(f"unexpected {len(payload)} byte frame")
+                _, _, mask = INPUT_MESSAGE.unpack(payload)
+                connection.inputs.append(mask)
+                if len(connection.inputs) > MAX_QUEUED_INPUTS:
+                    connection.inputs.popleft()
+        except (asyncio.IncompleteReadError, ConnectionError) as error:
+            log.debug('player %d disconnected: %s', player + 1, error)
+        finally:
+            self.slots[player] = None
+            writer.close()
+            log.info('player %d left', player + 1)
+
+    def sprite_id(self, surface) -> int:
+        index = self.sprite_ids.get(surface)
+        if index is None:
+            import assets
+            paths = {image: path for path, image in assets.cache.images.items()}
+            index = self.sprite_ids[surface] = len(self.sprite_paths)
+            self.sprite_paths.append(paths.get(surface, ''))
+        return index
+
+    def entity_states(self) -> dict:
+        game = self.game
+        ids = self.ids
+        states = {}
+        for group in (game.entities, game.enemies, game.bullets.active):
+            for entity in group:
+                entity_id = ids.get(entity)
+                if entity_id is None:
+                    entity_id = ids[entity] = len(ids)
+                position = entity.position
+                velocity = entity.velocity
+                states[entity_id] = (KIND_CODES[entity.KIND], position.x, position.y, velocity.x, velocity.y,
+                                     self.sprite_id(entity.img))
+        return states
+
+    def broadcast(self):
+        game = self.game
+        states = self.entity_states()
+        flags = (COOLDOWN_FLAG if game.cooldown else 0) | (GAME_OVER_FLAG if game.game_over else 0)
+        header = b''.join(PLAYER.pack(min(127, ship.LIVES), min(ship.kills, 0xFFFF),
+                                      min(ship.TELEPORT_POINTS, 0xFF)) for ship in game.ships)
+        for connection in self.slots:
+            if connection is None or connection.writer.transport.get_write_buffer_size() > MAX_BUFFERED_BYTES:
+                continue
+            sent = 0
+            if connection.sprites_sent < len(self.sprite_paths):
+                entries = []
+                for index in range(connection.sprites_sent, len(self.sprite_paths)):
+                    path = self.sprite_paths[index].encode()
+                    entries.append(SPRITE_ENTRY.pack(index, len(path)) + path)
+                sent += write_frame(connection.writer, SPRITES_HEADER.pack(SPRITES, len(entries)) + b''.join(entries))
+                connection.sprites_sent = len(self.sprite_paths)
+            payload = connection.encoder.encode(game.tick, states, header, flags, game.ships)
+            sent += write_frame(connection.writer, payload)
+            connection.bytes_sent += sent
+            self.bytes_sent += sent
+        self.snapshots += 1
+
+    def report(self) -> dict:
+        step = self.step_stats.summary()
+        snapshot = self.snapshot_stats.summary()
+        return {
+            'ticks': self.game.tick,
+            'step_ms_p50': step['p50'] * 1000,
+            'step_ms_p99': step['p99'] * 1000,
+            'snapshot_ms_p50': snapshot['p50'] * 1000,
+            'snapshot_ms_p99': snapshot['p99'] * 1000,
+            'bytes_sent': self.bytes_sent,
+        }
+
+    async def run(self):
+        server = await asyncio.start_server(self.handle, self.host, self.port)
+        # port 0 picks a free one, this is the one actually bound
+        self.port = server.sockets[0].getsockname()[1]
+        self.listening.set()
+        log.info('listening on %s:%d, waiting for %d players', self.host, self.port, len(self.slots))
+        async with server:
+            await self.ready.wait()
+            await self.play()
+            for connection in self.slots:
+                if connection is not None:
+                    connection.writer.close()
+
+    async def play(self):
+        game = self.game
+        loop = asyncio.get_running_loop()
+        clock = time.perf_counter
+        next_tick = loop.time()
+        last_report = clock()
+        bytes_reported = 0
+        while game.running and any(self.slots):
+            inputs = [connection.next_input() if connection is not None else frozenset()
+                      for connection in self.slots]
+            start = clock()
+            game.step_players(inputs)
+            self.step_stats.add(clock() - start)
+            if game.tick % self.snapshot_every == 0 or not game.running:
+                start = clock()
+                self.broadcast()
+                self.snapshot_stats.add(clock() - start)
+            next_tick += game.dt
+            delay = next_tick - loop.time()
+            if delay < -game.dt * MAX_QUEUED_INPUTS:
+                # too far behind to catch up, carry on from now instead of running a burst of ticks
+                next_tick = loop.time()
+            await asyncio.sleep(max(delay, 0.0))
+            if clock() - last_report >= 1:
+                report = self.report()
+                clients = sum(connection is not None for connection in self.slots)
+                log.info(f'tick {game.tick} enemies {len(game.enemies)} step ms p50/p99: {report["step_ms_p50"]:.2f}/'
+                         f'{report["step_ms_p99"]:.2f} snapshot ms p50/p99: {report["snapshot_ms_p50"]:.2f}/'
+                         f'{report["snapshot_ms_p99"]:.2f} bytes/s per client: '
+                         f'{(self.bytes_sent - bytes_reported) / max(clients, 1) / (clock() - last_report):.0f}')
+                bytes_reported = self.bytes_sent
+                last_report = clock()
+
+
+class Client:
+    # a player's end: sends the actions held every tick and keeps a ClientWorld up to date
+
+    def __init__(self, reader, writer, player: int, players: int, tick_rate: int):
+        self.reader = reader
+        self.writer = writer
+        self.player = player
+        self.players = players
+        self.tick_rate = tick_rate
+        self.world = ClientWorld(tick_rate)
+        self.bytes_received = 0
+        self.closed = False
+
+    @classmethod
+    async def connect(cls, host: str = HOST, port: int = PORT):
+        reader, writer = await asyncio.open_connection(host, port)
+        no_delay(writer)
+        _, player, players, tick_rate = WELCOME_MESSAGE.unpack(await read_frame(reader))
+        return cls(reader, writer, player, players, tick_rate)
+
+    async def receive(self):
+        try:
+            while True:
+                payload = await read_frame(self.reader)
+                self.bytes_received += FRAME.size + len(payload)
+                if payload[0] == SNAPSHOT:
+                    self.world.apply(payload)
+                elif payload[0] == SPRITES:
+                    self.world.add_sprites(payload)
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            self.closed = True
+
+    def send_input(self, tick: int, pressed):
+        if not self.closed:
+            write_frame(self.writer, INPUT_MESSAGE.pack(INPUT, tick & 0xFFFFFFFF, controls.action_mask(pressed)))
+
+    def close(self):
+        self.closed = True
+        self.writer.close()
+
+
+class PlayerView:
+    # the Spaceship fields the HUD reads, as the snapshots carry them
+    __slots__ = ('LIVES', 'kills', 'TELEPORT_POINTS')
+
+    def __init__(self, lives: int = 0, kills: int = 0, teleport_points: int = 0):
+        self.LIVES = lives
+        self.kills = kills
+        self.TELEPORT_POINTS = teleport_points
+
+
+async def run_script(client: Client, script, seconds: float):
+    # plays without a window, script(tick, None) gives the actions held each tick
+    receiver = asyncio.create_task(client.receive())
+    loop = asyncio.get_running_loop()
+    dt = 1.0 / client.tick_rate
+    next_tick = loop.time()
+    tick = 0
+    while not client.closed and tick < seconds * client.tick_rate:
+        client.send_input(tick, script(tick, None))
+        tick += 1
+        next_tick += dt
+        await asyncio.sleep(max(next_tick - loop.time(), 0.0))
+    client.close()
+    await receiver
+    return client.bytes_received
+
+
+async def play(client: Client, bindings: dict = None):
+    # the windowed client: local controls in, the server's entities drawn between the last two snapshots
+    import animation
+    import assets
+    import background
+    import hud
+    import renderer
+    win = pygame.display.set_mode((800, 600))
+    pygame.display.set_caption(f"Space Game - player {client.player + 1}")
+    controls.allow_events()
+    assets.cache.convert()
+    game_hud = hud.Hud(assets.font('Assets/superstarfont.ttf', 20), assets.font('Assets/superstarfont.ttf', 80))
+    screen = renderer.Renderer(win, background.build(win.get_size()), renderer.FULL)
+    player_controls = controls.Controls()
+    if bindings:
+        player_controls.bind_names(bindings)
+    receiver = asyncio.create_task(client.receive())
+    timestep = timing.FixedTimestep(client.tick_rate)
+    world = client.world
+    view = PlayerView()
+    loop = asyncio.get_running_loop()
+    frame_time = 1.0 / CLIENT_FPS
+    next_frame = loop.time()
+    last = time.perf_counter()
+    tick = 0
+    running = True
+    while running and not client.closed:
+        for event in pygame.event.get():
+            if event.type == pygame.QUIT:
+                running = False
+            player_controls.handle(event)
+        for _ in range(timestep.advance()):
+            client.send_input(tick, player_controls.poll())
+            tick += 1
+        now = time.perf_counter()
+        render_tick = world.advance(now - last)
+        last = now
+        if render_tick is not None:
+            screen.background.scroll_to(render_tick * world.dt)
+            if client.player < len(world.players):
+                view.LIVES, view.kills, view.TELEPORT_POINTS = world.players[client.player]
+            game_hud.update(view, world.cooldown, world.game_over)
+            game_hud.draw(screen)
+            for kind, x, y, vx, vy, sprite in world.interpolated(render_tick):
+                path = world.sprites.get(sprite)
+                if not path:
+                    continue
+                image = assets.image(path)
+                if KINDS[kind] == 'enemy':
+                    animation.variants.blit_centered(screen, image, (x, y), animation.facing(vx, vy))
+                else:
+                    screen.blit(image, (x, y))
+            if world.game_over:
+                game_hud.draw_overlay(screen)
+        screen.present()
+        next_frame += frame_time
+        await asyncio.sleep(max(next_frame - loop.time(), 0.0))
+    client.close()
+    await receiver
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--host', default=HOST)
+    parser.add_argument('--port', type=int, default=PORT)
+    parser.add_argument('--log-level', default='INFO', choices=('DEBUG', 'INFO', 'WARNING', 'ERROR'))
+    commands = parser.add_subparsers(dest='command', required=True)
+    serve = commands.add_parser('serve', help="run the game headless and wait for the players")
+    serve.add_argument('--players', type=int, default=2)
+    serve.add_argument('--seed', type=int)
+    join = commands.add_parser('join', help="play in a window, or scripted without one")
+    join.add_argument('--script', choices=('idle', 'random'), help="play without a window")
+    join.add_argument('--seconds', type=float, default=60.0, help="how long a scripted client plays")
+    join.add_argument('--bind', metavar='ACTION=KEY', action='append', default=[],
+                      help="rebind a control, e.g. --bind 'fire=left ctrl'")
+    args = parser.parse_args()
+    logging.basicConfig(level=args.log_level, format='%(message)s')
+    if args.command == 'serve' or args.script:
+        os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+        os.environ.setdefault('SDL_AUDIODRIVER', 'dummy')
+    if args.command == 'serve':
+        import test as game_module
+        server = Server(game_module.Game(seed=args.seed, players=args.players), args.host, args.port)
+        asyncio.run(server.run())
+        report = server.report()
+        log.info(f'{report["ticks"]} ticks, {report["bytes_sent"]} bytes sent')
+        return
+
+    async def join_game():
+        client = await Client.connect(args.host, args.port)
+        log.info('joined as player %d of %d', client.player + 1, client.players)
+        if args.script is None:
+            pygame.init()
+            await play(client, dict(item.split('=', 1) for item in args.bind))
+        else:
+            import headless
+            await run_script(client, headless.SCRIPTS[args.script](client.player), args.seconds)
+        log.info(f'{client.bytes_received} bytes received')
+
+    asyncio.run(join_game())
+
+
+if __name__ == '__main__':
+    main()
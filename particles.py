@@ -0,0 +1,145 @@
+import math
+
+import pygame
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+# hard cap on live particles, a full buffer overwrites the oldest ones first
+CAPACITY = 4096
+# sizes and colours a particle fades through over its life
+STAGES = 4
+DRAG = 0.92
+
+EXPLOSION = 0
+TRAIL = 1
+IMPACT = 2
+# kind -> (colour, side of the square in px when fresh)
+STYLES = {
+    EXPLOSION: ((255, 140, 40), 3),
+    TRAIL: ((120, 180, 255), 2),
+    IMPACT: ((255, 240, 120), 2),
+}
+MAX_SIZE = max(size for _, size in STYLES.values())
+
+
+def stage_styles(styles: dict = STYLES, stages: int = STAGES):
+    # (colours, sizes) indexed by kind * stages + stage, each stage smaller and darker than the one before
+    colors = []
+    sizes = []
+    for kind in range(len(styles)):
+        color, size = styles[kind]
+        for stage in range(stages):
+            fade = (stages - stage) / stages
+            colors.append(tuple(int(channel * fade) for channel in color))
+            sizes.append(max(1, round(size * fade)))
+    return colors, sizes
+
+
+class ParticleSystem:
+    # particles in preallocated arrays used as a ring buffer, moved and drawn in batched passes
+
+    def __init__(self, capacity: int = CAPACITY, seed=None):
+        if numpy is None:
+            raise RuntimeError("ParticleSystem needs numpy")
+        self.capacity = capacity
+        self.rng = numpy.random.default_rng(seed)
+        self.pos = numpy.zeros((capacity, 2), dtype=numpy.float32)
+        self.vel = numpy.zeros((capacity, 2), dtype=numpy.float32)
+        self.age = numpy.zeros(capacity, dtype=numpy.float32)
+        self.life = numpy.ones(capacity, dtype=numpy.float32)
+        self.kind = numpy.zeros(capacity, dtype=numpy.intp)
+        self.alive = numpy.zeros(capacity, dtype=bool)
+        self.next = 0
+        # live particles replaced before their time because the buffer was full
+        self.overwritten = 0
+        self.styles = None
+
+    def __len__(self):
+        return int(numpy.count_nonzero(self.alive))
+
+    def emit(self, kind: int, x: float, y: float, count: int, speed: float, life: float, direction: float = 0.0,
+             spread: float = 2 * math.pi):
+        count = min(count, self.capacity)
+        rows = (self.next + numpy.arange(count)) % self.capacity
+        self.next = (self.next + count) % self.capacity
+        self.overwritten += int(numpy.count_nonzero(self.alive[rows]))
+        rng = self.rng
+        angles = direction + (rng.random(count, dtype=numpy.float32) - 0.5) * spread
+        speeds = speed * (0.5 + rng.random(count, dtype=numpy.float32))
+        self.pos[rows, 0] = x
+        self.pos[rows, 1] = y
+        self.vel[rows, 0] = numpy.cos(angles) * speeds
+        self.vel[rows, 1] = numpy.sin(angles) * speeds
+        self.age[rows] = 0.0
+        self.life[rows] = life * (0.6 + 0.8 * rng.random(count, dtype=numpy.float32))
+        self.kind[rows] = kind
+        self.alive[rows] = True
+
+    def explode(self, x: float, y: float):
+        self.emit(EXPLOSION, x, y, 48, 140.0, 0.6)
+
+    def impact(self, x: float, y: float):
+        self.emit(IMPACT, x, y, 12, 90.0, 0.25, -math.pi / 2, math.pi)
+
+    def trail(self, x: float, y: float, direction: float):
+        self.emit(TRAIL, x, y, 3, 60.0, 0.35, direction, 0.6)
+
+    def update(self, dt: float):
+        # whole-array passes, cheaper than selecting the live rows first
+        self.vel *= DRAG
+        self.pos += self.vel * dt
+        self.age += dt
+        self.alive &= self.age < self.life
+
+    def draw(self, win):
+        # every live particle in one batch; a Renderer gets it deferred together with the area it covers
+        rows = numpy.flatnonzero(self.alive)
+        if not len(rows):
+            return None
+        # one contiguous column each, reductions over a strided (n, 2) view are several times slower
+        x = self.pos[rows, 0].astype(numpy.intp)
+        y = self.pos[rows, 1].astype(numpy.intp)
+        left = int(x.min())
+        top = int(y.min())
+        bounds = pygame.Rect(left, top, int(x.max()) - left + MAX_SIZE, int(y.max()) - top + MAX_SIZE)
+        if isinstance(win, pygame.Surface):
+            self.paint(win, rows, x, y)
+            return bounds
+        return win.batch(lambda surface: self.paint(surface, rows, x, y), bounds)
+
+    def paint(self, win, rows, x, y):
+        # writes the particle squares straight into the pixels, a few array passes instead of a blit each
+        if self.styles is None:
+            colors, sizes = stage_styles()
+            self.styles = (numpy.array([win.map_rgb(color) for color in colors], dtype=numpy.uint32),
+                           numpy.array(sizes, dtype=numpy.intp))
+        colors, sizes = self.styles
+        style = self.kind[rows] * STAGES + numpy.minimum(
+            (self.age[rows] / self.life[rows] * STAGES).astype(numpy.intp), STAGES - 1)
+        # squares not entirely inside the clip area are skipped rather than cut per pixel
+        clip = win.get_clip()
+        inside = (x >= clip.left) & (x <= clip.right - MAX_SIZE) & (y >= clip.top) & (y <= clip.bottom - MAX_SIZE)
+        x = x[inside]
+        y = y[inside]
+        style = style[inside]
+        color = colors[style]
+        side = sizes[style]
+        pixels = pygame.surfarray.pixels2d(win)
+        try:
+            for ring in range(MAX_SIZE):
+                # every pixel whose larger offset is `ring` belongs to the squares bigger than ring
+                if ring:
+                    larger = side > ring
+                    x = x[larger]
+                    y = y[larger]
+                    color = color[larger]
+                    side = side[larger]
+                for dx in range(ring + 1):
+                    pixels[x + dx, y + ring] = color
+                for dy in range(ring):
+                    pixels[x + ring, y + dy] = color
+        finally:
+            del pixels
@@ -0,0 +1,60 @@
+class Pool:
+    # fixed set of preallocated objects, the active ones kept in a compact list
+
+    def __init__(self, factory, capacity: int):
+        self.capacity = capacity
+        self.free = [factory() for _ in range(capacity)]
+        self.active = []
+        self.dropped = 0
+        for obj in self.free:
+            obj.pool_index = -1
+
+    def acquire(self):
+        if not self.free:
+            self.dropped += 1
+            return None
+        obj = self.free.pop()
+        obj.pool_index = len(self.active)
+        self.active.append(obj)
+        return obj
+
+    def release(self, obj):
+        index = obj.pool_index
+        if index < 0:
+            return
+        # swap the last active object into the hole so active stays compact
+        last = self.active.pop()
+        if last is not obj:
+            self.active[index] = last
+            last.pool_index = index
+        obj.pool_index = -1
+        self.free.append(obj)
+
+    def __len__(self):
+        return len(self.active)
+
+
+class BulletPool(Pool):
+
+    def __init__(self, factory, capacity: int, cooldown_ticks: int = 0):
+        super().__init__(factory, capacity)
+        self.cooldown_ticks = cooldown_ticks
+        # gun -> first tick it may fire again, every player's gun cools down on its own
+        self.next_fire_ticks = {}
+
+    def fire(self, x: float, y: float, tick: int, gun=None):
+        # None while the gun is cooling down or every bullet is in flight
+        if tick < self.next_fire_ticks.get(gun, 0):
+            return None
+        bullet = self.acquire()
+        if bullet is None:
+            return None
+        bullet.fire(x, y)
+        self.next_fire_ticks[gun] = tick + self.cooldown_ticks
+        return bullet
+
+    def release(self, bullet):
+        if bullet.pool_index < 0:
+            return
+        bullet.respawn_bullet()
+        super().release(bullet)
@@ -0,0 +1,94 @@
+import csv
+import json
+import time
+from collections import deque
+
+import timing
+
+PHASES = ('events', 'collision', 'update', 'hud', 'render', 'flip', 'sleep')
+OVERLAY_KEY_NAME = 'F3'
+OVERLAY_COLOR = (255, 255, 0)
+OVERLAY_REFRESH_FRAMES = 30
+
+
+class FrameProfiler:
+    # mark(phase) charges the time since the previous mark to that phase of the current frame
+
+    def __init__(self, window: int = 600, keep_frames: bool = False, clock=time.perf_counter):
+        self.clock = clock
+        self.window = window
+        self.history = {phase: deque(maxlen=window) for phase in PHASES + ('frame',)}
+        self.keep_frames = keep_frames
+        self.frames = []
+        self.frame = 0
+        self.current = dict.fromkeys(PHASES, 0.0)
+        self._start = None
+        self._last = None
+        self.overlay = False
+        self._overlay_lines = []
+
+    def begin_frame(self):
+        now = self.clock()
+        self._start = now
+        self._last = now
+        current = self.current
+        for phase in current:
+            current[phase] = 0.0
+
+    def mark(self, phase: str):
+        if self._last is None:
+            return
+        now = self.clock()
+        self.current[phase] += now - self._last
+        self._last = now
+
+    def end_frame(self):
+        if self._start is None:
+            return
+        total = self.clock() - self._start
+        history = self.history
+        for phase, seconds in self.current.items():
+            history[phase].append(seconds)
+        history['frame'].append(total)
+        if self.keep_frames:
+            record = dict(self.current)
+            record['frame'] = total
+            self.frames.append(record)
+        self.frame += 1
+        self._start = None
+        self._last = None
+
+    def summary(self) -> dict:
+        return {phase: timing.percentiles(samples) for phase, samples in self.history.items()}
+
+    def toggle_overlay(self):
+        self.overlay = not self.overlay
+        self._overlay_lines = []
+
+    def draw_overlay(self, win, font, text_cache, pos=(560, 60)):
+        # per-phase p50/p95/p99/max in ms, re-rendered twice a second rather than every frame
+        if not self.overlay:
+            return
+        if not self._overlay_lines or self.frame % OVERLAY_REFRESH_FRAMES == 0:
+            lines = []
+            for phase, stats in self.summary().items():
+                lines.append(f'{phase:<9} {stats["p50"] * 1000:5.1f} {stats["p95"] * 1000:5.1f} '
+                             f'{stats["p99"] * 1000:5.1f} {stats["max"] * 1000:5.1f}')
+            self._overlay_lines = [text_cache.render(font, line, OVERLAY_COLOR) for line in lines]
+        x, y = pos
+        for surface in self._overlay_lines:
+            win.blit(surface, (x, y))
+            y += surface.get_height()
+
+    def dump(self, path: str):
+        # per-frame phase times in seconds, .json for a list of objects, anything else for CSV
+        if path.endswith('.json'):
+            with open(path, 'w') as file:
+                json.dump({'phases': list(PHASES), 'frames': self.frames, 'summary': self.summary()}, file)
+            return
+        with open(path, 'w', newline='') as file:
+            writer = csv.writer(file)
+            writer.writerow(('frame',) + PHASES + ('total',))
+            for index, record in enumerate(self.frames):
+                writer.writerow([index] + [f'{record[phase]:.6f}' for phase in PHASES] +
+                                [f'{record["frame"]:.6f}'])
@@ -0,0 +1,158 @@
+import time
+
+import pygame
+
+FULL = 'full'
+DIRTY = 'dirty'
+# above this share of the screen a single full update is cheaper than many small ones
+FULL_REDRAW_THRESHOLD = 0.5
+
+
+def merge_rects(rects):
+    # unions overlapping rects until none overlap, keeps update() lists short
+    merged = []
+    for rect in rects:
+        rect = rect.copy()
+        i = 0
+        while i < len(merged):
+            if rect.colliderect(merged[i]):
+                rect.union_ip(merged.pop(i))
+                i = 0
+            else:
+                i += 1
+        merged.append(rect)
+    return merged
+
+
+class Renderer:
+    # collects blits for a frame and pushes either the whole screen or only what changed; the background is a
+    # Surface or anything with draw(win), one that reports scrolling redraws the whole screen every frame
+
+    def __init__(self, win, background, mode: str = DIRTY, threshold: float = FULL_REDRAW_THRESHOLD):
+        self.win = win
+        self.background = background
+        self.mode = mode
+        self.threshold = threshold
+        self.screen_rect = win.get_rect()
+        self.items = []
+        self.previous = []
+        # (draw(win), rect) pairs drawn after the blits, always treated as changed
+        self.batches = []
+        self.previous_batches = []
+        self.force_full = True
+        self.pixels = 0
+        self.full_redraws = 0
+        self.profiler = None
+        # time spent drawing the background, summed until background_report() reads it
+        self.background_seconds = 0.0
+        self.background_frames = 0
+
+    def blit(self, surface, pos):
+        # same call shape as Surface.blit so Entity.render works on a renderer
+        rect = surface.get_rect(topleft=(int(pos[0]), int(pos[1])))
+        self.items.append((surface, rect))
+        return rect
+
+    def batch(self, draw, bounds):
+        # defers draw(win), a single call that paints everything inside bounds (e.g. all particles)
+        self.batches.append((draw, bounds))
+        return bounds
+
+    def invalidate(self):
+        self.force_full = True
+
+    def present(self):
+        items = self.items
+        self.background_frames += 1
+        if self.mode == FULL or self.force_full or getattr(self.background, 'scrolling', False):
+            self._draw_full(items)
+        else:
+            dirty = self._dirty_rects(items)
+            area = sum(rect.w * rect.h for rect in dirty)
+            if area > self.threshold * self.screen_rect.w * self.screen_rect.h:
+                self._draw_full(items)
+            elif dirty:
+                self._draw_dirty(items, dirty)
+                self._mark('render')
+                pygame.display.update(dirty)
+                self._mark('flip')
+                self.pixels = area
+            else:
+                self.pixels = 0
+                self._mark('render')
+        self.previous = items
+        self.items = []
+        self.previous_batches = self.batches
+        self.batches = []
+        return self.pixels
+
+    def background_report(self, frame_budget: float):
+        # (average background ms per frame, share of frame_budget seconds) since the previous report
+        frames = max(self.background_frames, 1)
+        seconds = self.background_seconds / frames
+        self.background_seconds = 0.0
+        self.background_frames = 0
+        return seconds * 1000, seconds / frame_budget
+
+    def _draw_background(self, area=None):
+        start = time.perf_counter()
+        background = self.background
+        if not isinstance(background, pygame.Surface):
+            background.draw(self.win)
+        elif area is None:
+            self.win.blit(background, (0, 0))
+        else:
+            self.win.blit(background, area, area)
+        self.background_seconds += time.perf_counter() - start
+
+    def _mark(self, phase):
+        if self.profiler is not None:
+            self.profiler.mark(phase)
+
+    def _dirty_rects(self, items):
+        previous = self.previous
+        changed = []
+        for i in range(max(len(items), len(previous))):
+            new = items[i] if i < len(items) else None
+            old = previous[i] if i < len(previous) else None
+            if new is not None and old is not None and new[0] is old[0] and new[1] == old[1]:
+                continue
+            if old is not None:
+                changed.append(old[1])
+            if new is not None:
+                changed.append(new[1])
+        for _, rect in self.previous_batches:
+            changed.append(rect)
+        for _, rect in self.batches:
+            changed.append(rect)
+        clipped = [rect.clip(self.screen_rect) for rect in changed]
+        return merge_rects([rect for rect in clipped if rect.w and rect.h])
+
+    def _draw_full(self, items):
+        win = self.win
+        win.fill((0, 0, 0))
+        self._draw_background()
+        for surface, rect in items:
+            win.blit(surface, rect)
+        for draw, rect in self.batches:
+            draw(win)
+        self._mark('render')
+        pygame.display.update()
+        self._mark('flip')
+        self.force_full = False
+        self.full_redraws += 1
+        self.pixels = self.screen_rect.w * self.screen_rect.h
+
+    def _draw_dirty(self, items, dirty):
+        win = self.win
+        for area in dirty:
+            win.set_clip(area)
+            win.fill((0, 0, 0), area)
+            self._draw_background(area)
+            for surface, rect in items:
+                if rect.colliderect(area):
+                    win.blit(surface, rect)
+            for draw, rect in self.batches:
+                if rect.colliderect(area):
+                    draw(win)
+        win.set_clip(None)
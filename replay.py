@@ -0,0 +1,193 @@
+"""Records the pressed controls per simulation tick and replays it headless, bit for bit.
+
+    python replay.py record session.sgr --seed 7 --ticks 36000
+    python replay.py play session.sgr --repeat 3
+"""
+import argparse
+import hashlib
+import struct
+import time
+
+import headless
+from headless import game_module
+import controls
+import timing
+
+MAGIC = b'SGRP'
+VERSION = 3
+# magic, version, seed, tick rate, tick count
+HEADER = struct.Struct('<4sHqII')
+# version 3 follows the header with the number of enemy cap changes and a (tick, cap) entry for each
+BUDGETS = struct.Struct('<I')
+BUDGET = struct.Struct('<IH')
+# action mask, number of consecutive ticks it was held for
+RUN = struct.Struct('<BH')
+MAX_RUN = 0xFFFF
+# bit i of a mask is RECORD_ACTIONS[i]; the order is part of the file format, only ever append.
+# version 1 stored raw key codes in the same bits, its files are not read any more; version 2 files have no
+# enemy cap changes and still load
+RECORD_ACTIONS = (
+    controls.LEFT,
+    controls.RIGHT,
+    controls.UP,
+    controls.DOWN,
+    controls.TELEPORT,
+    controls.FIRE,
+    controls.FLOOR,
+)
+
+
+def action_mask(pressed) -> int:
+    return controls.action_mask(pressed, RECORD_ACTIONS)
+
+
+def mask_actions(mask: int) -> frozenset:
+    return controls.mask_actions(mask, RECORD_ACTIONS)
+
+
+class Recording:
+    # the seed of a session plus one key mask per tick, run-length encoded on disk, and the ticks at which
+    # the spawn director changed the enemy cap
+
+    def __init__(self, seed: int, tick_rate: int = game_module.TICK_RATE, masks=None, budgets=None):
+        self.seed = seed
+        self.tick_rate = tick_rate
+        self.masks = masks if masks is not None else []
+        self.budgets = budgets if budgets is not None else {}
+
+    def record(self, pressed, budget: int = None):
+        if budget is not None:
+            self.budgets[len(self.masks)] = budget
+        self.masks.append(action_mask(pressed))
+
+    def __len__(self):
+        return len(self.masks)
+
+    def to_bytes(self) -> bytes:
+        out = [HEADER.pack(MAGIC, VERSION, self.seed, self.tick_rate, len(self.masks)), BUDGETS.pack(len(self.budgets))]
+        out.extend(BUDGET.pack(tick, budget) for tick, budget in sorted(self.budgets.items()))
+        mask = None
+        run = 0
+        for value in self.masks:
+            if value == mask and run < MAX_RUN:
+                run += 1
+                continue
+            if run:
+                out.append(RUN.pack(mask, run))
+            mask = value
+            run = 1
+        if run:
+            out.append(RUN.pack(mask, run))
+        return b''.join(out)
+
+    @classmethod
+    def from_bytes(cls, data: bytes):
+        magic, version, seed, tick_rate, count = HEADER.unpack_from(data, 0)
+        if magic != MAGIC:
+            raise ValueError("not a SpaceGame recording")
+        if version not in (2, VERSION):
+            raise ValueError(f"unsupported recording version {version}")
+        offset = HEADER.size
+        budgets = {}
+        if version >= 3:
+            changes, = BUDGETS.unpack_from(data, offset)
+            offset += BUDGETS.size
+            for _ in range(changes):
+                tick, budget = BUDGET.unpack_from(data, offset)
+                budgets[tick] = budget
+                offset += BUDGET.size
+        masks = []
+        for mask, run in RUN.iter_unpack(data[offset:]):
+            masks.extend([mask] * run)
+        if len(masks) != count:
+            raise ValueError(f"recording is truncated: {len(masks)} of {count} ticks")
+        return cls(seed, tick_rate, masks, budgets)
+
+    def save(self, path: str):
+        with open(path, 'wb') as file:
+            file.write(self.to_bytes())
+
+    @classmethod
+    def load(cls, path: str):
+        with open(path, 'rb') as file:
+            return cls.from_bytes(file.read())
+
+
+def state_hash(game) -> str:
+    # digest of everything the simulation carries between ticks, equal hashes mean identical sessions
+    digest = hashlib.sha256()
+    for entity in game.entities + game.enemies + game.bullets.active:
+        digest.update(struct.pack('<4d2q', entity.position.x, entity.position.y, entity.velocity.x,
+                                  entity.velocity.y, entity.touches, entity.RightToLeft))
+    ship = game.ship
+    digest.update(struct.pack('<5q', game.tick, ship.kills, ship.LIVES, ship.TELEPORT_POINTS, game.game_over))
+    digest.update(repr(game.rng.getstate()).encode())
+    return digest.hexdigest()
+
+
+def record_session(seed: int, ticks: int, script: str = 'bot') -> Recording:
+    # plays a scripted session headless and keeps its input
+    recording = Recording(seed)
+    run = headless.SCRIPTS[script](seed)
+    game = game_module.Game(seed=seed)
+    while game.running and game.tick < ticks:
+        pressed = run(game.tick, game)
+        recording.record(pressed)
+        game.step(pressed)
+    return recording
+
+
+def replay(recording: Recording, step_stats: timing.FrameStats = None):
+    # runs the recorded ticks as fast as possible, returns the finished game
+    game = game_module.Game(tick_rate=recording.tick_rate, seed=recording.seed)
+    clock = time.perf_counter
+    # masks repeat for long runs, decode each distinct one once
+    decoded = {}
+    budgets = recording.budgets
+    for tick, mask in enumerate(recording.masks):
+        if not game.running:
+            break
+        pressed = decoded.get(mask)
+        if pressed is None:
+            pressed = decoded[mask] = mask_actions(mask)
+        budget = budgets.get(tick)
+        if step_stats is None:
+            game.step(pressed, budget)
+        else:
+            start = clock()
+            game.step(pressed, budget)
+            step_stats.add(clock() - start)
+    return game
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    commands = parser.add_subparsers(dest='command', required=True)
+    record = commands.add_parser('record', help="record a scripted headless session")
+    record.add_argument('path')
+    record.add_argument('--seed', type=int, default=0)
+    record.add_argument('--ticks', type=int, default=10 * 60 * game_module.TICK_RATE)
+    record.add_argument('--script', choices=sorted(headless.SCRIPTS), default='bot')
+    play = commands.add_parser('play', help="replay a recording and report its speed and final state")
+    play.add_argument('path')
+    play.add_argument('--repeat', type=int, default=1)
+    args = parser.parse_args()
+    if args.command == 'record':
+        recording = record_session(args.seed, args.ticks, args.script)
+        recording.save(args.path)
+        print(f'{len(recording)} ticks, {len(recording.to_bytes())} bytes -> {args.path}')
+        return
+    recording = Recording.load(args.path)
+    for _ in range(args.repeat):
+        stats = timing.FrameStats(size=len(recording))
+        start = time.perf_counter()
+        game = replay(recording, stats)
+        elapsed = time.perf_counter() - start
+        summary = stats.summary()
+        print(f'{game.tick} ticks in {elapsed:.2f}s ({game.tick / elapsed:.0f} ticks/s) '
+              f'step us p50/p95/p99/max: {summary["p50"] * 1e6:.0f}/{summary["p95"] * 1e6:.0f}/'
+              f'{summary["p99"] * 1e6:.0f}/{summary["max"] * 1e6:.0f} state {state_hash(game)[:16]}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,221 @@
+"""Keeps high scores and per-session telemetry in SQLite; every write goes through one background thread.
+
+    python scores.py top scores.db --limit 10
+    python scores.py session scores.db 42
+"""
+import argparse
+import logging
+import queue
+import sqlite3
+import threading
+import time
+
+log = logging.getLogger(__name__)
+
+PATH = 'scores.db'
+# places on the game over leaderboard
+TOP = 5
+# most writes per transaction, and how long the writer keeps collecting after the first one
+BATCH_SIZE = 256
+FLUSH_SECONDS = 1.0
+SCHEMA = (
+    """
+    CREATE TABLE IF NOT EXISTS sessions (
+        id INTEGER PRIMARY KEY,
+        started REAL NOT NULL,
+        ended REAL,
+        seed INTEGER,
+        kills INTEGER NOT NULL DEFAULT 0,
+        lives_lost INTEGER NOT NULL DEFAULT 0,
+        teleports INTEGER NOT NULL DEFAULT 0,
+        ticks INTEGER NOT NULL DEFAULT 0,
+        game_over INTEGER NOT NULL DEFAULT 0
+    )
+    """,
+    # the leaderboard reads the first rows of this index and stops, however many sessions there are
+    'CREATE INDEX IF NOT EXISTS sessions_by_kills ON sessions (kills DESC) WHERE ended IS NOT NULL',
+    """
+    CREATE TABLE IF NOT EXISTS samples (
+        session INTEGER NOT NULL,
+        metric TEXT NOT NULL,
+        tick INTEGER NOT NULL,
+        value REAL NOT NULL,
+        PRIMARY KEY (session, metric, tick)
+    ) WITHOUT ROWID
+    """,
+)
+LEADERBOARD = 'SELECT id, kills FROM sessions WHERE ended IS NOT NULL ORDER BY kills DESC, id LIMIT ?'
+
+# writer queue entries, (kind, session, ...)
+BEGIN = 'begin'
+SAMPLE = 'sample'
+END = 'end'
+STOP = ('stop', None)
+
+
+def open_store(path: str):
+    connection = sqlite3.connect(path)
+    connection.execute('PRAGMA journal_mode=WAL')
+    # a crash loses at most the last transactions, never corrupts the file
+    connection.execute('PRAGMA synchronous=NORMAL')
+    for statement in SCHEMA:
+        connection.execute(statement)
+    return connection
+
+
+def top(connection, limit: int = TOP):
+    # [(session id, kills)], best first, ties in the order they were played
+    return connection.execute(LEADERBOARD, (limit,)).fetchall()
+
+
+class Session:
+    # one game as the store records it; id is set by the writer thread once the row exists
+
+    def __init__(self, seed=None):
+        self.id = None
+        self.seed = seed
+        self.started = time.time()
+        self.kills = 0
+        self.lives_lost = 0
+        self.teleports = 0
+        self.ticks = 0
+        self.game_over = False
+        self.ended = False
+
+
+class ScoreStore:
+    # the game thread only queues writes; a writer thread commits them in batches, one transaction each
+
+    def __init__(self, path: str = PATH, places: int = TOP, batch_size: int = BATCH_SIZE,
+                 flush_seconds: float = FLUSH_SECONDS):
+        self.path = path
+        self.places = places
+        self.batch_size = batch_size
+        self.flush_seconds = flush_seconds
+        # read once up front, the game over screen merges the current session into it without touching the disk
+        connection = open_store(path)
+        try:
+            self.leaderboard = top(connection, places)
+        finally:
+            connection.close()
+        self.queue = queue.SimpleQueue()
+        self.written = 0
+        self.batches = 0
+        self.thread = threading.Thread(target=self._write, name='score-writer', daemon=True)
+        self.thread.start()
+
+    def begin(self, seed=None) -> Session:
+        session = Session(seed)
+        self.queue.put((BEGIN, session))
+        return session
+
+    def sample(self, session: Session, metric: str, tick: int, value: float):
+        # one telemetry point, e.g. the FPS or the kills so far at a tick
+        self.queue.put((SAMPLE, session, metric, tick, value))
+
+    def end(self, session: Session, kills: int, lives_lost: int, teleports: int, ticks: int, game_over: bool):
+        # returns the leaderboard with this session ranked in, [(kills, is this session)]
+        session.kills = kills
+        session.lives_lost = lives_lost
+        session.teleports = teleports
+        session.ticks = ticks
+        session.game_over = game_over
+        session.ended = True
+        self.queue.put((END, session))
+        return self.ranked(session)
+
+    def ranked(self, session: Session):
+        entries = [(kills, False) for _, kills in self.leaderboard]
+        # after the stored sessions with as many kills, those were played first
+        place = len(entries)
+        while place and entries[place - 1][0] < session.kills:
+            place -= 1
+        entries.insert(place, (session.kills, True))
+        return entries[:self.places]
+
+    def close(self):
+        # waits until everything queued so far is on disk
+        self.queue.put(STOP)
+        self.thread.join()
+
+    def _write(self):
+        connection = open_store(self.path)
+        try:
+            stopping = False
+            while not stopping:
+                batch = [self.queue.get()]
+                deadline = time.monotonic() + self.flush_seconds
+                while batch[-1] is not STOP and len(batch) < self.batch_size:
+                    timeout = deadline - time.monotonic()
+                    if timeout <= 0:
+                        break
+                    try:
+                        batch.append(self.queue.get(timeout=timeout))
+                    except queue.Empty:
+                        break
+                if batch[-1] is STOP:
+                    stopping = True
+                    batch.pop()
+                if batch:
+                    try:
+                        self._commit(connection, batch)
+                    except sqlite3.Error:
+                        log.exception('dropped %d score writes', len(batch))
+        finally:
+            connection.close()
+
+    def _commit(self, connection, batch):
+        samples = []
+        with connection:
+            for entry in batch:
+                kind, session = entry[0], entry[1]
+                if kind == BEGIN:
+                    cursor = connection.execute('INSERT INTO sessions (started, seed) VALUES (?, ?)',
+                                                (session.started, session.seed))
+                    session.id = cursor.lastrowid
+                elif kind == SAMPLE:
+                    samples.append((session.id,) + entry[2:])
+                elif kind == END:
+                    connection.execute('UPDATE sessions SET ended = ?, kills = ?, lives_lost = ?, teleports = ?, '
+                                       'ticks = ?, game_over = ? WHERE id = ?',
+                                       (time.time(), session.kills, session.lives_lost, session.teleports,
+                                        session.ticks, session.game_over, session.id))
+            connection.executemany('INSERT OR REPLACE INTO samples (session, metric, tick, value) '
+                                   'VALUES (?, ?, ?, ?)', samples)
+        self.written += len(batch)
+        self.batches += 1
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    commands = parser.add_subparsers(dest='command', required=True)
+    top_parser = commands.add_parser('top', help="print the leaderboard")
+    top_parser.add_argument('path')
+    top_parser.add_argument('--limit', type=int, default=10)
+    session_parser = commands.add_parser('session', help="print a session and its telemetry")
+    session_parser.add_argument('path')
+    session_parser.add_argument('id', type=int)
+    args = parser.parse_args()
+    connection = open_store(args.path)
+    try:
+        if args.command == 'top':
+            for place, (session, kills) in enumerate(top(connection, args.limit), 1):
+                print(f'{place:>3}. {kills:>5} kills  session {session}')
+            return
+        row = connection.execute('SELECT started, ended, seed, kills, lives_lost, teleports, ticks, game_over '
+                                 'FROM sessions WHERE id = ?', (args.id,)).fetchone()
+        if row is None:
+            print(f'no session {args.id}')
+            return
+        started, ended, seed, kills, lives_lost, teleports, ticks, game_over = row
+        print(f'session {args.id} seed {seed} started {time.ctime(started)} kills {kills} lives lost {lives_lost} '
+              f'teleports {teleports} ticks {ticks} game over {bool(game_over)}')
+        for metric, tick, value in connection.execute('SELECT metric, tick, value FROM samples WHERE session = ? '
+                                                      'ORDER BY metric, tick', (args.id,)):
+            print(f'  {metric:<10}{tick:>8}{value:>10.1f}')
+    finally:
+        connection.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -1,14 +1,15 @@
 import cx_Freeze
 
+import build_atlas
+
 executables = [cx_Freeze.Executable("test.py")]
 
+# packs the sprites into Assets/atlas.png first, the loose sprite files are not shipped
+include_files = build_atlas.build()
+
 cx_Freeze.setup(
     name="SpaceGame",
     options={"build_exe": {"packages": ["pygame"],
-                           "include_files": ["Assets/background1.png", "Assets/bullet.png", "Assets/enemy.png",
-                                             "Assets/heart.png",
-                                             "Assets/spaceship.png", "Assets/music.png", "Assets/mute.png",
-                                             "Assets/enemy1.png", "Assets/enemy2.png",
-                                             "Assets/enemy3.png", "Assets/shot.mp3", "Assets/SpaceGame.mp3"]}},
+                           "include_files": include_files}},
     executables=executables
 )
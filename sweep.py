@@ -0,0 +1,256 @@
+"""Runs a grid of gameplay parameters through seeded headless sessions and keeps the results in SQLite.
+
+    python sweep.py run sweep.db --param ship_thrust=200,250,300 --param respawn_touches=8,12,16 --seeds 64
+    python sweep.py report sweep.db --sort mean_kills
+
+Sessions already in the database are skipped, so an interrupted sweep picks up where it stopped.
+"""
+import argparse
+import itertools
+import json
+import multiprocessing
+import sqlite3
+import time
+
+import headless
+from headless import game_module
+import broadphase
+import director
+
+# parameter -> (object, attribute) it overrides for the length of a session
+TARGETS = {
+    'ship_thrust': (game_module.Spaceship, 'THRUST'),
+    'ship_max_thrust': (game_module.Spaceship, 'MAX_THRUST'),
+    'collision_radius': (broadphase, 'COLLISION_RADIUS'),
+    'respawn_touches': (game_module, 'RESPAWN_TOUCHES'),
+    'life_cooldown_seconds': (game_module, 'LIFE_COOLDOWN_SECONDS'),
+    'collision_mode': (game_module, 'COLLISION_MODE'),
+}
+DEFAULTS = {name: getattr(target, attribute) for name, (target, attribute) in TARGETS.items()}
+COLLISION_MODES = {broadphase.MASK: broadphase.MASK, broadphase.RADIUS: broadphase.RADIUS}
+# enemy steering comes from the waves, these scale every wave's thrust range and max thrust, or its dy range
+WAVE_SCALES = ('enemy_thrust_scale', 'enemy_dy_scale')
+PARAMETERS = tuple(TARGETS) + WAVE_SCALES
+
+RESULT_COLUMNS = ('kills', 'lives_lost', 'survival_seconds', 'game_over', 'ticks_per_sec')
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS sessions (
+    point TEXT NOT NULL,
+    seed INTEGER NOT NULL,
+    ticks INTEGER NOT NULL,
+    script TEXT NOT NULL,
+    kills INTEGER NOT NULL,
+    lives_lost INTEGER NOT NULL,
+    survival_seconds REAL NOT NULL,
+    game_over INTEGER NOT NULL,
+    ticks_per_sec REAL NOT NULL,
+    PRIMARY KEY (point, seed, ticks, script)
+) WITHOUT ROWID
+"""
+# results written per transaction, at most this many sessions are redone after a crash
+COMMIT_EVERY = 64
+
+_base_waves = None
+
+
+def point_key(point: dict) -> str:
+    # canonical text of a grid point, the same parameters always give the same key
+    return json.dumps(point, sort_keys=True, separators=(',', ':'))
+
+
+def grid_points(grid: dict):
+    names = sorted(grid)
+    for values in itertools.product(*(grid[name] for name in names)):
+        yield dict(zip(names, values))
+
+
+def scaled_waves(point: dict) -> dict:
+    global _base_waves
+    if _base_waves is None:
+        _base_waves = director.load_config()
+    thrust_scale = point.get('enemy_thrust_scale', 1.0)
+    dy_scale = point.get('enemy_dy_scale', 1.0)
+    config = dict(_base_waves)
+    config['waves'] = [
+        director.Wave(wave.name, wave.count, wave.alive, wave.spawn_interval, wave.sprites,
+                      _scale_range(wave.thrust, thrust_scale), _scale_range(wave.dy, dy_scale),
+                      wave.max_thrust * thrust_scale if wave.max_thrust else None)
+        for wave in _base_waves['waves']
+    ]
+    return config
+
+
+def _scale_range(bounds, scale: float):
+    # Enemy.move draws integers from these ranges
+    if not bounds:
+        return bounds
+    return [int(round(bounds[0] * scale)), max(int(round(bounds[1] * scale)), int(round(bounds[0] * scale)))]
+
+
+def apply(point: dict):
+    # sets every swept value for this process, anything the point leaves out goes back to its default
+    for name, (target, attribute) in TARGETS.items():
+        value = point.get(name, DEFAULTS[name])
+        if name == 'collision_mode':
+            value = COLLISION_MODES[value]
+        setattr(target, attribute, value)
+    return scaled_waves(point)
+
+
+def _run(job):
+    key, point, seed, ticks, script = job
+    waves = apply(point)
+    return key, headless.run_session(seed, ticks, script, waves)
+
+
+def open_store(path: str):
+    connection = sqlite3.connect(path)
+    connection.execute('PRAGMA journal_mode=WAL')
+    connection.execute(SCHEMA)
+    return connection
+
+
+def completed(connection, ticks: int, script: str) -> set:
+    rows = connection.execute('SELECT point, seed FROM sessions WHERE ticks = ? AND script = ?', (ticks, script))
+    return set(rows)
+
+
+def pending_jobs(grid: dict, seeds, ticks: int, script: str, done: set):
+    for point in grid_points(grid):
+        key = point_key(point)
+        for seed in seeds:
+            if (key, seed) not in done:
+                yield key, point, seed, ticks, script
+
+
+def run_sweep(path: str, grid: dict, seeds, ticks: int = headless.DEFAULT_TICKS, script: str = 'bot',
+              workers: int = None, progress=None):
+    # returns the number of sessions run; results are streamed into the store as they finish
+    unknown = set(grid) - set(PARAMETERS)
+    if unknown:
+        raise ValueError(f"unknown parameters: {', '.join(sorted(unknown))}")
+    # the radius only takes part in radius mode, under mask mode every radius would run the same sessions
+    modes = set(grid.get('collision_mode', (DEFAULTS['collision_mode'],)))
+    if 'collision_radius' in grid and modes != {broadphase.RADIUS}:
+        raise ValueError(f"collision_radius needs collision_mode={broadphase.RADIUS}")
+    connection = open_store(path)
+    jobs = list(pending_jobs(grid, list(seeds), ticks, script, completed(connection, ticks, script)))
+    insert = (f'INSERT OR REPLACE INTO sessions (point, seed, ticks, script, {", ".join(RESULT_COLUMNS)}) '
+              f'VALUES (?, ?, ?, ?{", ?" * len(RESULT_COLUMNS)})')
+    batch = []
+    finished = 0
+    try:
+        with multiprocessing.Pool(workers) as workers_pool:
+            chunksize = max(len(jobs) // (64 * (workers or multiprocessing.cpu_count())), 1)
+            for key, result in workers_pool.imap_unordered(_run, jobs, chunksize):
+                values = tuple(result[column] for column in RESULT_COLUMNS)
+                batch.append((key, result['seed'], ticks, script) + values)
+                if len(batch) >= COMMIT_EVERY:
+                    finished += _flush(connection, insert, batch)
+                    if progress is not None:
+                        progress(finished, len(jobs))
+            # the workers run SDL, which turns the SIGTERM of Pool.terminate into a QUIT event, so let them exit
+            workers_pool.close()
+            workers_pool.join()
+    finally:
+        finished += _flush(connection, insert, batch)
+        connection.close()
+    return finished
+
+
+def _flush(connection, insert: str, batch: list) -> int:
+    count = len(batch)
+    if count:
+        with connection:
+            connection.executemany(insert, batch)
+        batch.clear()
+    return count
+
+
+def report(path: str, ticks: int = None, script: str = None):
+    # one row per grid point, averaged over its seeds
+    where = []
+    args = []
+    if ticks is not None:
+        where.append('ticks = ?')
+        args.append(ticks)
+    if script is not None:
+        where.append('script = ?')
+        args.append(script)
+    query = ('SELECT point, COUNT(*), AVG(kills), AVG(lives_lost), AVG(survival_seconds), AVG(game_over), '
+             'AVG(ticks_per_sec) FROM sessions' + (' WHERE ' + ' AND '.join(where) if where else '') +
+             ' GROUP BY point')
+    connection = open_store(path)
+    try:
+        rows = connection.execute(query, args).fetchall()
+    finally:
+        connection.close()
+    return [
+        {
+            'point': json.loads(point),
+            'sessions': count,
+            'mean_kills': kills,
+            'mean_lives_lost': lives_lost,
+            'mean_survival_seconds': survival,
+            'game_over_rate': game_over,
+            'mean_ticks_per_sec': speed,
+        }
+        for point, count, kills, lives_lost, survival, game_over, speed in rows
+    ]
+
+
+def parse_param(text: str):
+    # name=v1,v2,... with numbers parsed as numbers
+    name, _, values = text.partition('=')
+    if not values:
+        raise argparse.ArgumentTypeError(f"expected NAME=V1,V2,... got {text!r}")
+    parsed = []
+    for value in values.split(','):
+        try:
+            parsed.append(json.loads(value))
+        except ValueError:
+            parsed.append(value)
+    return name, parsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    commands = parser.add_subparsers(dest='command', required=True)
+    run = commands.add_parser('run', help="run every grid point not yet in the store")
+    run.add_argument('path')
+    run.add_argument('--param', type=parse_param, action='append', default=[], metavar='NAME=V1,V2',
+                     help=f"one of {', '.join(PARAMETERS)}")
+    run.add_argument('--grid', metavar='JSON', help="file with {name: [values]}, merged with --param")
+    run.add_argument('--seeds', type=int, default=32, help="sessions per grid point")
+    run.add_argument('--seed', type=int, default=0, help="first seed")
+    run.add_argument('--ticks', type=int, default=headless.DEFAULT_TICKS)
+    run.add_argument('--script', choices=sorted(headless.SCRIPTS), default='bot')
+    run.add_argument('--workers', type=int, default=None)
+    show = commands.add_parser('report', help="per grid point averages")
+    show.add_argument('path')
+    show.add_argument('--ticks', type=int)
+    show.add_argument('--script', choices=sorted(headless.SCRIPTS))
+    show.add_argument('--sort', default='mean_kills')
+    show.add_argument('--top', type=int)
+    args = parser.parse_args()
+    if args.command == 'run':
+        grid = {}
+        if args.grid:
+            with open(args.grid) as file:
+                grid.update(json.load(file))
+        grid.update(dict(args.param))
+        start = time.perf_counter()
+        count = run_sweep(args.path, grid, range(args.seed, args.seed + args.seeds), args.ticks, args.script,
+                          args.workers, lambda done, total: print(f'{done}/{total} sessions', flush=True))
+        elapsed = time.perf_counter() - start
+        print(f'{count} sessions in {elapsed:.1f}s -> {args.path}')
+        return
+    rows = sorted(report(args.path, args.ticks, args.script), key=lambda row: row[args.sort], reverse=True)
+    for row in rows[:args.top]:
+        print(f'{point_key(row["point"])}  sessions {row["sessions"]}  kills {row["mean_kills"]:.1f}  '
+              f'lives lost {row["mean_lives_lost"]:.2f}  survival {row["mean_survival_seconds"]:.1f}s  '
+              f'game over {row["game_over_rate"]:.2f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -2,49 +2,119 @@ import pygame
 import math
 import time
 import random
+import logging
+import sqlite3
+import assets
+import broadphase
+import hud
+import renderer
+import timing
+import profiler
+import pool
+import director
+import loader
+import ecs
+import controls
+import animation
+import particles
+import background
+import scores
+
+log = logging.getLogger(__name__)
 
 # Caption and Icon
-icon = pygame.image.load("Assets/console.png")
+icon = assets.image("Assets/console.png")
 pygame.display.set_icon(icon)
 pygame.display.set_caption("Space Game")
-KEYMAP = {
-    pygame.K_LEFT: False,
-    pygame.K_RIGHT: False,
-    pygame.K_UP: False,
-    pygame.K_DOWN: False,
-    pygame.K_SPACE: False,
-    pygame.K_LALT: False,
-    pygame.K_F12: False,
-}
+
+
+BOUNCE_SIDE = (-0.5, 0.0)
+BOUNCE_TOP = (0.0, 1.0)
+BOUNCE_FLOOR = (0.0, -1.0)
+INTERPOLATION_SNAP = 50
+# broadphase.MASK: pixel-perfect sprite overlap, broadphase.RADIUS: the old 36 px corner distance
+COLLISION_MODE = broadphase.MASK
+BULLET_SPEED = 300.0
+
+
+def _operand(other):
+    # (x, y) of anything a Vector2 can be combined with: numbers, 2-tuples/lists and vector-likes.
+    # the exact-class fast paths are in the operators, subclasses such as numpy.float64 end up here
+    if isinstance(other, (int, float)):
+        return other, other
+    if isinstance(other, (tuple, list)):
+        return other[0], other[1]
+    try:
+        return other.x, other.y
+    except AttributeError:
+        raise TypeError(f"unsupported Vector2 operand: {other!r}") from None
 
 
 class Vector2:
+    __slots__ = ('x', 'y')
 
     def __init__(self, x=0.0, y=0.0):
         self.x = float(x)
         self.y = float(y)
 
     def __add__(self, other):
-        if isinstance(other, float):
-            return Vector2(self.x + other, self.y + other)
-        elif isinstance(other, Vector2):
+        cls = other.__class__
+        if cls is Vector2:
             return Vector2(self.x + other.x, self.y + other.y)
-        else:
-            assert False, "Unknown type"
+        if cls is float:
+            return Vector2(self.x + other, self.y + other)
+        ox, oy = _operand(other)
+        return Vector2(self.x + ox, self.y + oy)
 
     def __mul__(self, other):
-        if isinstance(other, float):
-            return Vector2(self.x * other, self.y * other)
-        elif isinstance(other, Vector2):
+        cls = other.__class__
+        if cls is Vector2:
             return Vector2(self.x * other.x, self.y * other.y)
+        if cls is float:
+            return Vector2(self.x * other, self.y * other)
+        ox, oy = _operand(other)
+        return Vector2(self.x * ox, self.y * oy)
+
+    def iadd(self, other):
+        if other.__class__ is Vector2:
+            self.x += other.x
+            self.y += other.y
         else:
-            assert False, "Unknown type"
+            ox, oy = _operand(other)
+            self.x += ox
+            self.y += oy
+        return self
+
+    def imul(self, other):
+        if other.__class__ is Vector2:
+            self.x *= other.x
+            self.y *= other.y
+        else:
+            ox, oy = _operand(other)
+            self.x *= ox
+            self.y *= oy
+        return self
+
+    __iadd__ = iadd
+    __imul__ = imul
+
+    def scale_add(self, other, factor: float):
+        # self += other * factor without the temporary vector
+        self.x += other.x * factor
+        self.y += other.y * factor
+        return self
 
     def shorten_length(self, reduction_length: float):
-        return self * (1.0 - reduction_length / self.length())
+        length = self.length()
+        if length == 0.0:
+            return Vector2()
+        return self * (1.0 - reduction_length / length)
 
     def length(self) -> float:
-        return math.sqrt(self.x ** 2 + self.y ** 2)
+        return math.sqrt(self.x * self.x + self.y * self.y)
+
+    def length_squared(self) -> float:
+        return self.x * self.x + self.y * self.y
 
     def copy(self):
         return Vector2(self.x, self.y)
@@ -53,12 +123,15 @@ class Vector2:
         return f'Vector2(x={self.x}, y={self.y})'
 
     def print_scalar(self):
-        return math.sqrt(self.x ** 2 + self.y ** 2)
+        return self.length()
 
 
 class Entity:
+    KIND = None
 
-    def __init__(self, position: Vector2, img):
+    def __init__(self, position: Vector2, img, rng=None):
+        # rng is the world's random.Random, the random module itself when the entity lives on its own
+        self.rng = rng if rng is not None else random
         self.position = position
         self.velocity = Vector2()
         self.img = img
@@ -66,12 +139,31 @@ class Entity:
         self.touches = 0
         self.dead = False
         self.isfloor = False
+        self.previous_position = Vector2(position.x, position.y)
 
     def update(self, delta_time: float):
-        self.position += self.velocity * delta_time
+        self.position.scale_add(self.velocity, delta_time)
+
+    def save_previous(self):
+        self.previous_position.x = self.position.x
+        self.previous_position.y = self.position.y
+
+    def render_position(self, alpha: float = 1.0):
+        # position between the last two ticks, teleports and respawns are not smeared across the screen
+        x = self.position.x
+        y = self.position.y
+        px = self.previous_position.x
+        py = self.previous_position.y
+        if alpha >= 1.0 or abs(x - px) > INTERPOLATION_SNAP or abs(y - py) > INTERPOLATION_SNAP:
+            return x, y
+        return px + (x - px) * alpha, py + (y - py) * alpha
+
+    def render(self, win, alpha: float = 1.0):
+        win.blit(self.img, self.render_position(alpha))
 
-    def render(self, win):
-        win.blit(self.img, (self.position.x, self.position.y))
+    def drawn_sprite(self):
+        # (surface, x, y) as render() puts it on screen at this tick, mask collision tests exactly that
+        return self.img, int(self.position.x), int(self.position.y)
 
     def __repr__(self):
         return f'Entity(position={repr(self.position)}, velocity={repr(self.position)})'
@@ -81,14 +173,14 @@ class Entity:
 
     def respawn(self, touches_in_a_second):
         self.touches = 0
-        rnd_x = random.randint(200, 700)
+        rnd_x = self.rng.randint(200, 700)
         if touches_in_a_second > 12:
             self.position.y -= 50
             # self.velocity = Vector2(1, -3)
 
     def die(self):
-        x = random.randint(10, 600)
-        y = random.randint(50, 100)
+        x = self.rng.randint(10, 600)
+        y = self.rng.randint(50, 100)
         v = Vector2()
         pos = Vector2(x, -y)
         self.velocity = v
@@ -99,15 +191,14 @@ class Entity:
     def borders(self):
         x = self.position.x
         y = self.position.y
-        v = Vector2(-0.5, 0)
         if x > 735:
             self.position.x = 734
-            self.velocity = self.velocity.__mul__(v)
+            self.velocity.imul(BOUNCE_SIDE)
             self.touches += 1
             self.RightToLeft = False
         elif x < 2:
             self.position.x = 3
-            self.velocity = self.velocity.__mul__(v)
+            self.velocity.imul(BOUNCE_SIDE)
             self.touches += 1
             self.RightToLeft = True
         if y > 570:
@@ -118,7 +209,7 @@ class Entity:
             self.velocity *= 0.7
         if y < -100:
             self.position.y = -90
-            self.velocity = self.velocity.__mul__(Vector2(0, 1))
+            self.velocity.imul(BOUNCE_TOP)
 
     def is_touching_border(self):
         x = self.position.x
@@ -134,14 +225,12 @@ class Entity:
         return False
 
     def collision(self, other):
-        v_self = Vector2(self.velocity.x, self.velocity.y)
-        v_other = Vector2(other.velocity.x, other.velocity.y)
-        rnd = random.randint(7, 10)
-        rnd1 = random.randint(7, 10)
         if isinstance(other, Entity):
-            distance = math.sqrt(
-                math.pow(self.position.x - other.position.x, 2) + math.pow(self.position.y - other.position.y, 2))
-            if distance < 36:
+            if broadphase.touching(self, other, COLLISION_MODE):
+                v_self = Vector2(self.velocity.x, self.velocity.y)
+                v_other = Vector2(other.velocity.x, other.velocity.y)
+                rnd = self.rng.randint(7, 10)
+                rnd1 = self.rng.randint(7, 10)
                 if self.velocity.x > 0:
                     self.position.x -= 6
                 elif self.velocity.x < 0:
@@ -166,73 +255,71 @@ class Entity:
 
 
 class Spaceship(Entity):
+    KIND = 'ship'
     THRUST = 250.0
     MAX_THRUST = 300.0
     TELEPORT_POINTS = 3
     LIVES = 3
 
-    def __init__(self):
-        img = pygame.image.load("Assets/ship.png")
-        super(Spaceship, self).__init__(Vector2(350, 500), img)
+    def __init__(self, rng=None):
+        img = assets.image("Assets/ship.png")
+        super(Spaceship, self).__init__(Vector2(350, 500), img, rng)
         self.img = img
         self.LIVES = 3
         self.kills = 0
+        self.teleports_used = 0
+        # this ship's controls for the current tick, set by the game before every step
+        self.input = controls.InputState()
+        self.teleport_debounce = controls.Debounce(TELEPORT_COOLDOWN_TICKS)
 
     def update(self, delta_time: float):
         prev_value = self.velocity.copy()
-        prev_press = ""
-        if KEYMAP[pygame.K_UP]:
+        pressed = self.input.pressed
+        if controls.UP in pressed:
             self.position.y -= 1
             self.velocity.y -= Spaceship.THRUST * delta_time
-            prev_press = "up"
-        if KEYMAP[pygame.K_DOWN]:
+        if controls.DOWN in pressed:
             self.position.y += 1
             self.velocity.y += Spaceship.THRUST * delta_time
-            prev_press = "down"
-        if KEYMAP[pygame.K_LEFT]:
+        if controls.LEFT in pressed:
             self.position.x -= 1
-            prev_press = "left"
             self.velocity.x -= Spaceship.THRUST * delta_time
-        if KEYMAP[pygame.K_RIGHT]:
+        if controls.RIGHT in pressed:
             self.position.x += 1
-            prev_press = "right"
             self.velocity.x += Spaceship.THRUST * delta_time
-        if KEYMAP[pygame.K_F12]:
+        if controls.FLOOR in pressed:
             self.isfloor = True
-        if self.velocity.length() >= Spaceship.MAX_THRUST:
+        if self.velocity.length_squared() >= Spaceship.MAX_THRUST ** 2:
             self.velocity = prev_value
         super(Spaceship, self).update(delta_time)
 
-    def update_once_in_a_second(self):
-        prev_press = ""
-        if KEYMAP[pygame.K_UP]:
-            prev_press = "up"
-        if KEYMAP[pygame.K_DOWN]:
-            prev_press = "down"
-        if KEYMAP[pygame.K_LEFT]:
-            self.position.x -= 1
-            prev_press = "left"
-        if KEYMAP[pygame.K_RIGHT]:
-            prev_press = "right"
-        if KEYMAP[pygame.K_SPACE] and self.TELEPORT_POINTS > 0:
-            if prev_press == "right":
-                self.position.x += 100
-                self.use_teleport()
-            elif prev_press == "left":
-                self.position.x -= 100
-                self.use_teleport()
-            elif prev_press == "up":
-                self.position.y -= 100
-                self.use_teleport()
+    def teleport(self, tick: int) -> bool:
+        # one jump per press of the teleport key, towards the direction held, right before left before up
+        state = self.input
+        if controls.TELEPORT not in state.just_pressed or self.TELEPORT_POINTS <= 0:
+            return False
+        pressed = state.pressed
+        if controls.RIGHT in pressed:
+            dx, dy = 100, 0
+        elif controls.LEFT in pressed:
+            dx, dy = -100, 0
+        elif controls.UP in pressed:
+            dx, dy = 0, -100
+        else:
+            return False
+        if not self.teleport_debounce.ready(tick):
+            return False
+        self.position.x += dx
+        self.position.y += dy
+        self.use_teleport()
+        return True
 
     def use_teleport(self):
         self.TELEPORT_POINTS -= 1
+        self.teleports_used += 1
 
-    def render(self, win):
-        win.blit(self.img, (self.position.x, self.position.y))
-
-    def firepos(self):
-        return Bullet(self.position.x + 12, self.position.y)
+    def render(self, win, alpha: float = 1.0):
+        win.blit(self.img, self.render_position(alpha))
 
     def teleport_points_add(self):
         if self.kills - 1 % 2 and self.TELEPORT_POINTS < 10:
@@ -241,281 +328,629 @@ class Spaceship(Entity):
     def borders(self):
         x = self.position.x
         y = self.position.y
-        v = Vector2(-0.5, 0)
         if x > 735:
             self.position.x = 734
-            self.velocity = self.velocity.__mul__(v)
+            self.velocity.imul(BOUNCE_SIDE)
             self.touches += 1
             self.RightToLeft = False
         elif x < 2:
             self.position.x = 3
-            self.velocity = self.velocity.__mul__(v)
+            self.velocity.imul(BOUNCE_SIDE)
             self.touches += 1
             self.RightToLeft = True
         if y > 535:
             self.position.y = 530
             self.touches += 1
-            self.velocity = self.velocity.__mul__(Vector2(0, -1))
+            self.velocity.imul(BOUNCE_FLOOR)
             # self.position.y = -90
             # self.velocity *= 0.7
         if y < 0:
             self.position.y = 10
-            self.velocity = self.velocity.__mul__(Vector2(0, -1))
+            self.velocity.imul(BOUNCE_FLOOR)
 
 
 class Enemy(Entity):
+    KIND = 'enemy'
     MAX_THRUST = 200.0
-
-    def __init__(self):
-        x_initial_position = random.randint(200, 600)
+    THRUST_RANGE = (50, 200)
+    DY_RANGE = (1, 160)
+    SPRITES = ("enemy.png", "enemy2.png", "enemy1.png", "enemy3.png", "enemy4.png")
+    ANIMATION_FPS = 8
+    # draws the sprite turned towards where the enemy is heading, mask collision tests the turned frame too
+    FACE_VELOCITY = True
+
+    def __init__(self, rng=None):
+        x_initial_position = (rng if rng is not None else random).randint(200, 600)
         self.is_dead = False
-        self.sprites = []
-        self.sprites.append(pygame.image.load("Assets/enemy.png"))
-        self.sprites.append(pygame.image.load("Assets/enemy2.png"))
-        self.sprites.append(pygame.image.load("Assets/enemy1.png"))
-        self.sprites.append(pygame.image.load("Assets/enemy3.png"))
-        self.sprites.append(pygame.image.load("Assets/enemy4.png"))
+        self.animation = animation.shared(["Assets/" + name for name in self.SPRITES], self.ANIMATION_FPS)
+        self.sprites = self.animation.frames
+        self.animation_time = 0.0
         self.current_sprite = 0
         self.img = self.sprites[int(self.current_sprite)]
-        super(Enemy, self).__init__(Vector2(x_initial_position, 0), self.img)
+        self.thrust_range = self.THRUST_RANGE
+        self.dy_range = self.DY_RANGE
+        self.checked_touches = 0
+        # drawn_sprite's variant and offset for this frame image, cleared whenever move() steers the enemy.
+        # the heading drawn is the one move() left, bounces during the collision pass only show next tick
+        self.drawn_img = None
+        self.drawn = None
+        super(Enemy, self).__init__(Vector2(x_initial_position, 0), self.img, rng)
+
+    def configure(self, sprites=None, thrust_range=None, dy_range=None, max_thrust=None):
+        # per-wave look and steering, anything left out keeps the class defaults
+        names = sprites if sprites else self.SPRITES
+        self.animation = animation.shared(["Assets/" + name for name in names], self.ANIMATION_FPS)
+        self.sprites = self.animation.frames
+        self.thrust_range = tuple(thrust_range) if thrust_range else self.THRUST_RANGE
+        self.dy_range = tuple(dy_range) if dy_range else self.DY_RANGE
+        self.MAX_THRUST = max_thrust if max_thrust else Enemy.MAX_THRUST
+
+    def reset(self):
+        # a fresh enemy at the top of the screen, for enemies reused by the spawn director
+        self.position.x = self.rng.randint(200, 600)
+        self.position.y = 0.0
+        self.velocity.x = 0.0
+        self.velocity.y = 0.0
+        self.save_previous()
+        self.touches = 0
+        self.checked_touches = 0
+        self.dead = False
+        self.RightToLeft = True
+        self.animation_time = 0.0
+        self.current_sprite = 0
+        self.img = self.sprites[0]
+        self.drawn_img = None
+
+    def animate(self, delta_time: float):
+        self.animation_time += delta_time
+        self.current_sprite = self.animation.index_at(self.animation_time)
+        self.img = self.sprites[self.current_sprite]
 
     def update_sprite(self):
-        if self.current_sprite == 4:
+        if self.current_sprite >= len(self.sprites) - 1:
             self.current_sprite = 0
         else:
             self.current_sprite += 1
         self.img = self.sprites[int(self.current_sprite)]
 
+    def render(self, win, alpha: float = 1.0):
+        if not self.FACE_VELOCITY:
+            return win.blit(self.img, self.render_position(alpha))
+        angle = animation.facing(self.velocity.x, self.velocity.y)
+        return animation.variants.blit_centered(win, self.img, self.render_position(alpha), angle)
+
+    def drawn_sprite(self):
+        if not self.FACE_VELOCITY:
+            return super().drawn_sprite()
+        # the rotated variant around the upright frame's centre, as blit_centered places it
+        img = self.img
+        if img is not self.drawn_img:
+            variant = animation.variants.get(img, animation.facing(self.velocity.x, self.velocity.y))
+            self.drawn_img = img
+            self.drawn = (variant, (img.get_width() - variant.get_width()) / 2,
+                          (img.get_height() - variant.get_height()) / 2)
+        variant, dx, dy = self.drawn
+        return variant, int(self.position.x + dx), int(self.position.y + dy)
+
     def move(self, delta_time: float):
         prev_value = self.velocity.copy()
-        thrust = random.randint(50, 200)
-        dy = random.randint(1, 160)
+        thrust = self.rng.randint(*self.thrust_range)
+        dy = self.rng.randint(*self.dy_range)
         if self.RightToLeft:
             self.velocity.x += thrust * delta_time
         else:
             self.velocity.x -= thrust * delta_time
-        if self.velocity.length() >= self.MAX_THRUST:
+        if self.velocity.length_squared() >= self.MAX_THRUST ** 2:
             self.velocity = prev_value
         self.velocity.y += dy * delta_time
+        self.drawn_img = None
 
 
 class Music:
+    BACKGROUND = "Assets/SpaceGame.mp3"
+    SHOT = "Assets/shot.mp3"
+    SHOT_VOLUME = 0.05
+
     def __init__(self):
-        self.img = pygame.image.load("Assets/music.png")
-        self.img_music = pygame.image.load("Assets/music.png")
-        self.img1 = pygame.image.load("Assets/mute.png")
-        self.background_music = pygame.mixer.Sound("Assets/SpaceGame.mp3")
-        self.shot_music = pygame.mixer.Sound("Assets/shot.mp3")
+        self.img = assets.image("Assets/music.png")
+        self.img_music = assets.image("Assets/music.png")
+        self.img1 = assets.image("Assets/mute.png")
+        self.shot_music = assets.sound(self.SHOT)
         self.pos = Vector2(0, 0)
-        pygame.mixer.Sound.play(self.background_music, 100)
-        self.shot_music.set_volume(0.05)
+        # streamed from disk while playing instead of decoding the whole track up front
+        pygame.mixer.music.load(self.BACKGROUND)
+        pygame.mixer.music.play(100)
+        self.shot_music.set_volume(self.SHOT_VOLUME)
+
+    def toggle_mute(self):
+        if pygame.mixer.music.get_volume() > 0:
+            pygame.mixer.music.set_volume(0)
+            self.shot_music.set_volume(0)
+            self.img = self.img1
+        else:
+            pygame.mixer.music.set_volume(1.0)
+            self.shot_music.set_volume(self.SHOT_VOLUME)
+            self.img = self.img_music
 
 
 class Bullet(Entity):
-    def __init__(self, player_x, player_y):
-        img_bullet = pygame.image.load("Assets/bullet.png")
-        super(Bullet, self).__init__(Vector2(player_x, player_y), img_bullet)
+    KIND = 'bullet'
+
+    def __init__(self, player_x, player_y, rng=None):
+        img_bullet = assets.image("Assets/bullet.png")
+        super(Bullet, self).__init__(Vector2(player_x, player_y), img_bullet, rng)
         self.player_x = player_x
         self.player_y = player_y
         self.is_shot = False
+        # the Spaceship that fired it, credited with the kill
+        self.owner = None
 
-    def fire_bullet(self, music: Music):
-        if KEYMAP[pygame.K_LALT]:
-            self.velocity.y = -300
-            self.is_shot = True
-            pygame.mixer.Sound.play(music.shot_music)
-            return True
-        return False
+    def fire(self, x: float, y: float):
+        self.position.x = x
+        self.position.y = y
+        self.save_previous()
+        self.velocity.x = 0.0
+        self.velocity.y = -BULLET_SPEED
+        self.is_shot = True
 
     def respawn_bullet(self):
-        v = Vector2(0, 0)
-        self.position = v
-        self.velocity = Vector2()
-        self.img = self.img
+        # back to the pool's idle state, reused instead of building a new Bullet
+        self.position.x = 0.0
+        self.position.y = 0.0
+        self.velocity.x = 0.0
+        self.velocity.y = 0.0
         self.RightToLeft = True
         self.touches = 0
+        self.is_shot = False
+        self.owner = None
 
 
 class Item(Entity):
-    def __init__(self):
-        self.img = pygame.image.load("Assets/heart.png")
-        super().__init__(Vector2(0, 0), self.img)
+    KIND = 'item'
+
+    def __init__(self, rng=None):
+        self.img = assets.image("Assets/heart.png")
+        super().__init__(Vector2(0, 0), self.img, rng)
 
     def appear(self):
-        x = random.randint(0, 730)
-        y = random.randint(0, 530)
+        x = self.rng.randint(0, 730)
+        y = self.rng.randint(0, 530)
         self.position.x = x
         self.position.y = y
 
     def pickup(self, spaceship: Spaceship):
-        distance = math.sqrt(
-            math.pow(self.position.x - spaceship.position.x, 2) + math.pow(self.position.y - spaceship.position.y, 2))
-        if distance < 36:
+        if broadphase.touching(self, spaceship, COLLISION_MODE):
             self.position.x = -100
             self.position.y = -100
             spaceship.LIVES += 1
-TARGET_FPS = 60
-TARGET_FRAME_TIME = 1 / TARGET_FPS
 
 
-def main():
+TARGET_FPS = 60
+TICK_RATE = 60
+MAX_CATCH_UP_STEPS = 5
+RENDER_MODE = renderer.DIRTY
+# the scrolling starfield redraws the whole screen every frame, without it RENDER_MODE decides
+PARALLAX = True
+LIFE_COOLDOWN_SECONDS = 3
+GAME_OVER_SECONDS = 5
+HEART_SECONDS = 10
+RESPAWN_CHECK_SECONDS = 2
+RESPAWN_TOUCHES = 12
+BULLET_CAPACITY = 64
+FIRE_COOLDOWN_TICKS = 8
+TELEPORT_COOLDOWN_TICKS = 15
+# x of each further co-op ship relative to the one before
+PLAYER_SPACING = 100
+
+
+class Game:
+    # the simulation: everything that advances once per fixed tick, independent of rendering.
+    # state lives on the Entity objects, what happens to them each tick is decided by the ECS
+    # components they are registered with, each system running once per tick over its own entities
+
+    def __init__(self, music: Music = None, tick_rate: int = TICK_RATE, seed=None, waves: dict = None,
+                 players: int = 1):
+        self.music = music
+        self.tick_rate = tick_rate
+        self.dt = 1.0 / tick_rate
+        # every random draw of the simulation comes from here, so a seed and the input replay a session
+        self.seed = seed
+        self.rng = random.Random(seed)
+        rng = self.rng
+        self.heart = Item(rng)
+        self.heart.position.x = -100
+        self.heart.position.y = -100
+        # one ship per player, self.ship is the first one and the one the local HUD follows
+        self.ships = [Spaceship(rng) for _ in range(players)]
+        for index, ship in enumerate(self.ships):
+            ship.position.x += index * PLAYER_SPACING
+            ship.save_previous()
+        self.ship = self.ships[0]
+        self.entities = self.ships + [self.heart]
+        self.director = director.SpawnDirector(waves if waves is not None else director.load_config(),
+                                               lambda: Enemy(rng), tick_rate)
+        # compact list of the enemies in play, owned by the director's pool
+        self.enemies = self.director.active
+        self.bullets = pool.BulletPool(lambda: Bullet(0, 0, rng), BULLET_CAPACITY, FIRE_COOLDOWN_TICKS)
+        if COLLISION_MODE is broadphase.MASK:
+            self.grid = broadphase.SpatialHash(broadphase.MASK_CELL_SIZE)
+            self.pair_radius = broadphase.MASK_PAIR_RADIUS
+        else:
+            self.grid = broadphase.SpatialHash(broadphase.COLLISION_RADIUS)
+            self.pair_radius = broadphase.COLLISION_RADIUS
+        self.tick = 0
+        self.cooldown = False
+        self.cooldown_until = 0
+        self.game_over = False
+        self.game_over_tick = None
+        self.running = True
+        self.profiler = None
+        self.hud = None
+        self.effects = []
+        # particles.ParticleSystem when the game is drawn, headless runs leave it out
+        self.particles = None
+        self.scheduler = timing.TickScheduler()
+        self.scheduler.every(HEART_SECONDS * tick_rate, self.spawn_heart)
+        self.scheduler.every(RESPAWN_CHECK_SECONDS * tick_rate, self.respawn_enemies)
+        self.world = ecs.World()
+        for ship in self.ships:
+            self.world.add(ship, ecs.Interpolated, ecs.PlayerInput, ecs.Borders, ecs.Collider)
+        self.world.add(self.heart, ecs.Interpolated, ecs.Movement, ecs.Borders, ecs.Collider)
+        world = self.world
+        world.add_system(ecs.interpolation_system(world))
+        world.add_system(self.cooldown_system)
+        world.add_system(self.collision_system, 'collision')
+        world.add_system(self.fire_system)
+        world.add_system(self.teleport_system)
+        world.add_system(ecs.borders_system(world))
+        world.add_system(ecs.input_system(world))
+        world.add_system(ecs.movement_system(world))
+        # enemy movment
+        world.add_system(ecs.steering_system(world))
+        world.add_system(ecs.animation_system(world))
+        world.add_system(self.lifetime_system)
+        world.add_system(self.effects_system)
+        world.add_system(self.particles_system)
+        world.add_system(self.spawn_system)
+        world.add_system(self.hud_system, 'hud')
+        world.add_system(self.schedule_system)
+
+    def spawn_heart(self):
+        # every 10 seconds heart appears on the map
+        if any(ship.LIVES == 1 for ship in self.ships):
+            log.debug("Heart Appears")
+            self.heart.appear()
+
+    def respawn_enemies(self):
+        # every 2 seconds, if the enemy collided more than 12 times since the last check, respawns it
+        for enemy in self.enemies:
+            touches = enemy.touches - enemy.checked_touches
+            if touches > RESPAWN_TOUCHES:
+                enemy.respawn(touches)
+            enemy.checked_touches = enemy.touches
+
+    def cooldown_system(self, dt):
+        # cooldown of three seconds for the life system
+        if self.tick >= self.cooldown_until:
+            self.cooldown = False
+
+    def collision_system(self, dt):
+        hit = []
+        # every pair closer than the collision radius, found once per tick
+        killed = []
+        for pair, a, b in self.grid.build(self.world.entities(ecs.Collider)).pairs(self.pair_radius):
+            if pair is broadphase.SHIP_ENEMY:
+                if a.collision(b) and a not in hit:
+                    hit.append(a)
+            elif pair is broadphase.BULLET_ENEMY:
+                # is_shot is cleared when the bullet goes back to the pool, one kill per bullet
+                if a.is_shot and not b.dead and a.collision(b):
+                    if self.particles is not None:
+                        self.particles.impact(a.position.x + 16, a.position.y)
+                        self.particles.explode(b.position.x + 32, b.position.y + 32)
+                    shooter = a.owner if a.owner is not None else self.ship
+                    self.release_bullet(a)
+                    shooter.kills += 1
+                    shooter.teleport_points_add()
+                    self.effects.append(animation.Explosion(b.position.x, b.position.y, self.tick * self.dt))
+                    b.die()
+                    b.update_sprite()
+                    killed.append(b)
+            elif pair is broadphase.ENEMY_ENEMY:
+                a.collision(b)
+            elif pair is broadphase.SHIP_ITEM:
+                b.pickup(a)
+        # killed enemies go back to the director once the pair loop no longer walks the grid
+        for enemy in killed:
+            self.world.discard(enemy)
+            self.director.retire(enemy)
+        # checks if a player is hit, the life cooldown is shared by the whole team
+        if hit and not self.cooldown:
+            for ship in hit:
+                ship.LIVES -= 1
+                if ship.LIVES < 1:
+                    self.knock_out(ship)
+            self.cooldown = True
+            self.cooldown_until = self.tick + LIFE_COOLDOWN_SECONDS * self.tick_rate
+            if all(ship.LIVES < 1 for ship in self.ships) and not self.game_over:
+                self.game_over = True
+                self.game_over_tick = self.tick
+
+    def knock_out(self, ship):
+        # a ship out of lives stays where it is and leaves play, in co-op the others carry on without it
+        self.world.remove(ship, ecs.PlayerInput, ecs.Collider)
+
+    def fire_system(self, dt):
+        for ship in self.world.entities(ecs.PlayerInput):
+            if controls.FIRE in ship.input.pressed:
+                self.fire(ship)
+
+    def teleport_system(self, dt):
+        for ship in self.world.entities(ecs.PlayerInput):
+            ship.teleport(self.tick)
+
+    def lifetime_system(self, dt):
+        # bullets leaving the screen go back to the pool
+        expired = [entity for entity in self.world.entities(ecs.Lifetime) if entity.is_touching_border()]
+        for bullet in expired:
+            self.release_bullet(bullet)
+
+    def effects_system(self, dt):
+        # explosions are only drawn, they drop out once played through
+        if self.effects:
+            now = self.tick * self.dt
+            self.effects = [effect for effect in self.effects if not effect.done(now)]
+
+    def particles_system(self, dt):
+        particle_system = self.particles
+        if particle_system is None:
+            return
+        # exhaust out of the back of each ship in play, opposite to the thrust the controls apply
+        for ship in self.world.entities(ecs.PlayerInput):
+            pressed = ship.input.pressed
+            dx = (controls.RIGHT in pressed) - (controls.LEFT in pressed)
+            dy = (controls.DOWN in pressed) - (controls.UP in pressed)
+            if dx or dy:
+                position = ship.position
+                particle_system.trail(position.x + 32, position.y + 32, math.atan2(-dy, -dx))
+        particle_system.update(dt)
+
+    def spawn_system(self, dt):
+        enemy = self.director.update(self.tick)
+        if enemy is not None:
+            self.world.add(enemy, ecs.Interpolated, ecs.Borders, ecs.Movement, ecs.Steering, ecs.Animated,
+                           ecs.Collider)
+
+    def hud_system(self, dt):
+        if self.hud is not None:
+            self.hud.update(self.ship, self.cooldown, self.game_over)
+
+    def schedule_system(self, dt):
+        self.scheduler.run(self.tick)
+        if self.game_over and self.tick - self.game_over_tick > GAME_OVER_SECONDS * self.tick_rate:
+            self.running = False
+
+    def step(self, pressed=frozenset(), budget: int = None):
+        # pressed is the set of controls actions held during this tick
+        self.step_players((pressed,), budget)
+
+    def step_players(self, inputs, budget: int = None):
+        # one set of held actions per ship, ships without an entry hold nothing.
+        # budget is a new enemy cap from SpawnDirector.observe_frame, input like the keys so replays repeat it
+        if budget is not None:
+            self.director.budget = budget
+        for index, ship in enumerate(self.ships):
+            ship.input = ship.input.next(inputs[index] if index < len(inputs) else frozenset())
+        self.world.run(self.dt, self.profiler)
+        self.tick += 1
+
+    def fire(self, ship=None):
+        ship = ship if ship is not None else self.ship
+        bullet = self.bullets.fire(ship.position.x + 12, ship.position.y, self.tick, ship)
+        if bullet is None:
+            return False
+        bullet.owner = ship
+        self.add_bullet(bullet)
+        if self.music is not None:
+            pygame.mixer.Sound.play(self.music.shot_music)
+        return True
+
+    def add_bullet(self, bullet):
+        # a bullet taken from self.bullets starts moving and colliding
+        self.world.add(bullet, ecs.Interpolated, ecs.Movement, ecs.Collider, ecs.Lifetime)
+
+    def release_bullet(self, bullet):
+        self.world.discard(bullet)
+        self.bullets.release(bullet)
+
+    def render_time(self, alpha: float = 1.0) -> float:
+        # simulated seconds at the interpolated position draw() shows
+        return (self.tick - 1 + alpha) * self.dt
+
+    def draw(self, screen, game_hud: hud.Hud, alpha: float = 1.0):
+        game_hud.draw(screen)
+        if self.music is not None:
+            screen.blit(self.music.img, (self.music.pos.x, self.music.pos.y))
+        for entity in self.entities:
+            entity.render(screen, alpha)
+        for enemy in self.enemies:
+            enemy.render(screen, alpha)
+        for bullet in self.bullets.active:
+            bullet.render(screen, alpha)
+        now = self.render_time(alpha)
+        for effect in self.effects:
+            effect.render(screen, now)
+        if self.particles is not None:
+            self.particles.draw(screen)
+        if self.game_over:
+            game_hud.draw_overlay(screen)
+
+
+# seconds from the start of main() to the window opening, the assets being ready and the first frame
+STARTUP = {}
+
+
+def preload(asset_loader: loader.AssetLoader):
+    # everything the first frame needs, decoded on the loader threads behind the loading screen
+    for path in ("Assets/ship.png", "Assets/bullet.png", "Assets/heart.png", "Assets/music.png", "Assets/mute.png"):
+        asset_loader.image(path)
+    for name in Enemy.SPRITES:
+        asset_loader.image("Assets/" + name)
+    asset_loader.image(animation.EXPLOSION)
+    asset_loader.image(background.BASE_IMAGE, alpha=False)
+    asset_loader.sound(Music.SHOT)
+
+
+def end_session(store: scores.ScoreStore, session: scores.Session, game: Game):
+    ship = game.ship
+    return store.end(session, ship.kills, max(Spaceship.LIVES - ship.LIVES, 0), ship.teleports_used, game.tick,
+                     game.game_over)
+
+
+def main(record_path: str = None, seed: int = None, profile_path: str = None, max_frames: int = None,
+         bindings: dict = None, scores_path: str = None, parallax: bool = PARALLAX):
+    # scores_path is the high score database, only the command line defaults it to scores.PATH so callers
+    # driving main() from code, like the benchmarks, do not leave sessions behind
+    start = time.perf_counter()
     pygame.init()
     pygame.font.init()
     pygame.mixer.init()
+    win = pygame.display.set_mode((800, 600))
+    controls.allow_events()
+    STARTUP['init'] = time.perf_counter() - start
+    assets.cache.convert()
+    asset_loader = loader.AssetLoader()
+    preload(asset_loader)
+    if not asset_loader.run_loading_screen(win, assets.font(None, 40)):
+        return
+    # every enemy rotation and explosion size once, instead of rotozoom calls mid-game
+    enemy_animation = animation.shared(["Assets/" + name for name in Enemy.SPRITES], Enemy.ANIMATION_FPS)
+    animation.variants.precompute(enemy_animation.frames)
+    animation.variants.precompute(animation.explosion_frames(), animation.EXPLOSION_SCALES, rotate=False)
+    STARTUP['assets'] = time.perf_counter() - start
     music = Music()
     music.pos = Vector2(0, 570)
-    my_font = pygame.font.Font('Assets/superstarfont.ttf', 20)
-    my_font2 = pygame.font.Font('Assets/superstarfont.ttf', 80)
-    text_surface = my_font.render(' 123', False, (200, 0, 244))
-    text_surface1 = my_font.render(' 123', False, (200, 0, 244))
-    text_surface_lives = my_font.render('123', False, (200, 244, 244))
-    text_surface_general = my_font.render('123', False, (200, 244, 244))
-    win = pygame.display.set_mode((800, 600))
-    win.blit(text_surface, (0, 0))
-    background = pygame.image.load('Assets/background1.png')
-    bullet = Spaceship().firepos()
-    enemy1 = Enemy()
-    enemy1.position.x = 200
-    enemy2 = Enemy()
-    enemy2.position.x = 100
-    enemy2.RightToLeft = False
-    heart = Item()
-    heart_appear = False
-    heart.position.x = -100
-    heart.position.y = -100
-    entities = [bullet, Spaceship(), Enemy(), enemy1, enemy2, heart]
-    running = True
-    last_time = time.time()
-    last_tick = time.time()
-    this_time = time.time()
-    a_second = 0
-    last_touches = 0
+    my_font = assets.font('Assets/superstarfont.ttf', 20)
+    my_font2 = assets.font('Assets/superstarfont.ttf', 80)
+    game_hud = hud.Hud(my_font, my_font2)
+    backdrop = background.backdrop(win.get_size(), parallax)
+    screen = renderer.Renderer(win, backdrop, RENDER_MODE)
+    frame_profiler = profiler.FrameProfiler(keep_frames=profile_path is not None)
+    screen.profiler = frame_profiler
+    overlay_font = assets.font(None, 18)
+    if seed is None:
+        seed = random.randrange(2 ** 32)
+    game = Game(music, seed=seed)
+    recording = None
+    if record_path is not None:
+        import replay
+        recording = replay.Recording(seed, TICK_RATE)
+    game.profiler = frame_profiler
+    game.hud = game_hud
+    if particles.numpy is not None:
+        game.particles = particles.ParticleSystem(seed=seed)
+    game_hud.update(game.ship, game.cooldown, game.game_over)
+    store = None
+    if scores_path is not None:
+        try:
+            store = scores.ScoreStore(scores_path)
+        except sqlite3.Error as error:
+            log.warning('high scores are not saved: %s', error)
+    session = store.begin(seed) if store is not None else None
+    player_controls = controls.Controls()
+    if bindings:
+        player_controls.bind_names(bindings)
+    timestep = timing.FixedTimestep(TICK_RATE, MAX_CATCH_UP_STEPS)
+    limiter = timing.FrameLimiter(TARGET_FPS)
+    frame_stats = timing.FrameStats()
+    last_tick = time.perf_counter()
+    frames = 0
     fps = 0
-    new_bullet = False
-    t = time.time()
-    cooldown = False
-    counter = 0
-    game_over = False
-    while running:
-        current_time = time.time()
-        delta = current_time - last_time
-        last_time = current_time
-        before_time = time.time()
+    pixels = 0
+    # enemy cap proposed after the last frame, applied with the next tick
+    budget = None
+    while game.running:
         fps += 1
+        frame_start = time.perf_counter()
+        frame_profiler.begin_frame()
         for event in pygame.event.get():
             if event.type == pygame.QUIT:
-                running = False
+                game.running = False
+            if event.type in controls.EXPOSE_EVENTS:
+                screen.invalidate()
+            if event.type == pygame.KEYDOWN and event.key == pygame.K_F3:
+                frame_profiler.toggle_overlay()
             if event.type == pygame.KEYDOWN:
                 if event.key == pygame.K_m or event.key == pygame.K_F12:
-                    if pygame.mixer.Sound.get_volume(music.background_music) > 0:
-                        pygame.mixer.Sound.set_volume(music.background_music, 0)
-                        pygame.mixer.Sound.set_volume(music.shot_music, 0)
-                        music.img = music.img1
-                    else:
-                        pygame.mixer.Sound.set_volume(music.background_music, 1.0)
-                        pygame.mixer.Sound.set_volume(music.shot_music, 0.05)
-                        music.img = music.img_music
-            if event.type == pygame.KEYDOWN and event.key in KEYMAP:
-                KEYMAP[event.key] = True
-            elif event.type == pygame.KEYUP and event.key in KEYMAP:
-                KEYMAP[event.key] = False
-        for entity in entities:
-            # cooldown of a second for the life system
-            # checks if player is hit
-            if time.time() > t:
-                cooldown = False
-            if (entities[1].collision(entities[2]) or entities[1].collision(entities[3]) or entities[1].collision(
-                    entities[4]) or entities[2].collision(entities[1]) or entities[3].collision(entities[1]) or
-                    entities[4].collision(entities[1])) and not cooldown:
-                entities[1].LIVES -= 1
-                cooldown = True
-                t = time.time() + 3
-                if entities[1].LIVES < 1:
-                    game_over = True
-            if type(entity) is Item:
-                entity.pickup(entities[1])
-                # every 10 seconds heart appears on the map
-                if a_second % 600 == 0 and entities[1].LIVES == 1:
-                    print("Heart Appears")
-                    heart_appear = True
-                    heart.appear()
-            # collision between bullet and enemies -> need help in this area. now a good looking code.
-            if entities[0].collision(entities[2]) and entities[0].is_shot:
-                new_bullet = False
-                entities[1].kills += 1
-                entities[1].teleport_points_add()
-                entities[2].die()
-                entities[2].update_sprite()
-            a = entities[0].fire_bullet(music)
-            if entities[0].collision(entities[3]) and entities[0].is_shot:
-                new_bullet = False
-                entities[1].kills += 1
-                entities[1].teleport_points_add()
-                entities[3].die()
-                entities[3].update_sprite()
-            a = entities[0].fire_bullet(music)
-            if entities[0].collision(entities[4]) and entities[0].is_shot:
-                new_bullet = False
-                entities[1].kills += 1
-                entities[1].teleport_points_add()
-                entities[4].die()
-                entities[4].update_sprite()
-            entities[2].collision(entities[3])
-            entities[3].collision(entities[4])
-            entities[4].collision(entities[2])
-            a = entities[0].fire_bullet(music)
-            if a:
-                new_bullet = True
-            if entities[0].is_touching_border():
-                new_bullet = False
-            if not a and not new_bullet:
-                entities[0] = (entities[1].firepos())
-            entity.borders()
-            entity.update(delta)
-            # every 2 seconds, if the entity is enemy and there were 12 collions, respawns the enemy
-            if a_second % 120 == 0 and type(entity) is Enemy and entity.touches - last_touches > 12:
-                entity.respawn(entity.touches - last_touches)
-            last_touches = entity.touches
-            if a_second % 3 == 0 and type(entity) is Spaceship:
-                entity.update_once_in_a_second()
-            # enemy movment
-            if type(entity) is Enemy:
-                entity.move(delta)
-            text_surface = my_font.render(' {0} kills'.format(entities[1].kills), False, (200, 0, 244))
-            text_surface1 = my_font.render('Teleport points {0}'.format(entities[1].TELEPORT_POINTS), False,
-                                           (200, 0, 244))
-            text_surface_lives = my_font.render(' {0} Lives'.format(entities[1].LIVES), False, (200, 0, 244))
-            text_surface_general = my_font.render("Life Cooldown On", False, (200, 0, 244))
-        text_surface_game = my_font2.render("Game Over", False, (200, 0, 244))
-        win.fill((0, 0, 0))
-        win.blit(background, (0, 0))
-        win.blit(text_surface, (0, 0))
-        win.blit(text_surface_lives, (0, 50))
-        win.blit(text_surface1, (600, 0))
-        win.blit(music.img, (music.pos.x, music.pos.y))
-        if cooldown and not game_over:
-            win.blit(text_surface_general, (300, 300))
-        for entity in entities:
-            entity.render(win)
-        if game_over:
-            if counter == 0:
-                this_time = time.time()
-            counter += 1
-            win.blit(text_surface_game, (200, 300))
-            this_time1 = time.time()
-            if this_time1 - this_time > 5:
-                running = False
-        pygame.display.update()
-        after_time = time.time()
-        frame_time = after_time - before_time
-        if frame_time <= TARGET_FRAME_TIME:
-            time.sleep(TARGET_FRAME_TIME - frame_time)
-            a_second += 1
-        if time.time() - last_tick >= 1:
-            print(f'FPS: {fps}')
+                    music.toggle_mute()
+            player_controls.handle(event)
+        frame_profiler.mark('events')
+        for _ in range(timestep.advance()):
+            pressed = player_controls.poll()
+            if recording is not None:
+                recording.record(pressed, budget)
+            game.step(pressed, budget)
+            budget = None
+        if parallax:
+            backdrop.scroll_to(game.render_time(timestep.alpha))
+        game.draw(screen, game_hud, timestep.alpha)
+        frame_profiler.draw_overlay(screen, overlay_font, game_hud.cache)
+        pixels += screen.present()
+        frames += 1
+        if frames == 1:
+            STARTUP['first_frame'] = time.perf_counter() - start
+        if max_frames is not None and frames >= max_frames:
+            game.running = False
+        # the enemy budget follows the work done per frame, not the time spent waiting for vsync
+        requested = game.director.observe_frame(time.perf_counter() - frame_start)
+        if requested is not None:
+            budget = requested
+        frame_stats.add(limiter.wait())
+        frame_profiler.mark('sleep')
+        frame_profiler.end_frame()
+        if session is not None and game.game_over and not session.ended:
+            game_hud.show_leaderboard(end_session(store, session, game))
+        if time.perf_counter() - last_tick >= 1:
+            summary = frame_stats.summary()
+            background_ms, background_share = screen.background_report(1 / TARGET_FPS)
+            if session is not None:
+                store.sample(session, 'fps', game.tick, fps)
+                store.sample(session, 'kills', game.tick, game.ship.kills)
+                store.sample(session, 'teleports', game.tick, game.ship.teleports_used)
+            log.info(f'FPS: {fps} asset misses: {assets.cache.misses} pixels/frame: {pixels // max(fps, 1)} '
+                  f'frame ms p50/p95/p99: {summary["p50"] * 1000:.1f}/{summary["p95"] * 1000:.1f}/'
+                  f'{summary["p99"] * 1000:.1f} background ms: {background_ms:.2f} '
+                  f'({background_share:.0%} of the frame budget)')
+            assets.cache.reset_counters()
             fps = 0
-            last_tick = time.time()
+            pixels = 0
+            last_tick = time.perf_counter()
+    if store is not None:
+        # a session quit before game over still counts
+        if not session.ended:
+            end_session(store, session, game)
+        store.close()
+    if recording is not None:
+        recording.save(record_path)
+    if profile_path is not None:
+        frame_profiler.dump(profile_path)
 
 
 if __name__ == '__main__':
-    main()
+    import argparse
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--record', metavar='PATH', help="save the session input for replay.py")
+    parser.add_argument('--seed', type=int)
+    parser.add_argument('--profile', metavar='PATH', help="write per-frame phase times, .json or .csv")
+    parser.add_argument('--bind', metavar='ACTION=KEY', action='append', default=[],
+                        help="rebind a control, e.g. --bind 'fire=left ctrl'")
+    parser.add_argument('--scores', metavar='PATH', default=scores.PATH, help="high score database")
+    parser.add_argument('--no-scores', dest='scores', action='store_const', const=None,
+                        help="do not record this session")
+    parser.add_argument('--static-background', dest='parallax', action='store_false',
+                        help="draw background1.png without the parallax starfield")
+    parser.add_argument('--log-level', default='INFO', choices=('DEBUG', 'INFO', 'WARNING', 'ERROR'))
+    args = parser.parse_args()
+    logging.basicConfig(level=args.log_level, format='%(message)s')
+    main(args.record, args.seed, args.profile, bindings=dict(item.split('=', 1) for item in args.bind),
+         scores_path=args.scores, parallax=args.parallax)
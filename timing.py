@@ -0,0 +1,115 @@
+import time
+from collections import deque
+
+# time.sleep overshoots by up to a scheduler quantum, the last stretch before a deadline is spun instead
+SPIN_THRESHOLD = 0.002
+
+
+class FixedTimestep:
+    # turns real elapsed time into a whole number of fixed simulation ticks
+
+    def __init__(self, tick_rate: int = 60, max_steps: int = 5, clock=time.perf_counter):
+        self.tick_rate = tick_rate
+        self.dt = 1.0 / tick_rate
+        self.max_steps = max_steps
+        self.clock = clock
+        self.accumulator = 0.0
+        self.last = None
+        self.dropped = 0
+
+    def advance(self) -> int:
+        now = self.clock()
+        if self.last is None:
+            self.last = now
+            return 0
+        self.accumulator += now - self.last
+        self.last = now
+        steps = int(self.accumulator / self.dt)
+        if steps > self.max_steps:
+            # too far behind to catch up, drop the backlog instead of spiralling
+            self.dropped += steps - self.max_steps
+            steps = self.max_steps
+            self.accumulator = 0.0
+        else:
+            self.accumulator -= steps * self.dt
+        return steps
+
+    @property
+    def alpha(self) -> float:
+        # how far between the last two ticks the rendered frame is
+        return min(self.accumulator / self.dt, 1.0)
+
+
+class FrameLimiter:
+
+    def __init__(self, fps: int = 60, spin: float = SPIN_THRESHOLD, clock=time.perf_counter):
+        self.frame_time = 1.0 / fps
+        self.spin = spin
+        self.clock = clock
+        self.deadline = None
+        self.last = None
+
+    def wait(self) -> float:
+        # blocks until the next frame boundary, returns the full length of the frame that just ended
+        clock = self.clock
+        now = clock()
+        if self.deadline is None:
+            self.deadline = now + self.frame_time
+            self.last = now
+            return 0.0
+        remaining = self.deadline - now
+        if remaining > self.spin:
+            time.sleep(remaining - self.spin)
+        while clock() < self.deadline:
+            pass
+        now = clock()
+        if now - self.deadline > self.frame_time:
+            # missed a whole frame, restart the schedule instead of rushing the next ones
+            self.deadline = now + self.frame_time
+        else:
+            self.deadline += self.frame_time
+        elapsed = now - self.last
+        self.last = now
+        return elapsed
+
+
+def percentiles(samples) -> dict:
+    # p50/p95/p99/max of a sequence of timings, zeros when there are none
+    if not samples:
+        return {'p50': 0.0, 'p95': 0.0, 'p99': 0.0, 'max': 0.0}
+    ordered = sorted(samples)
+    last = len(ordered) - 1
+    return {
+        'p50': ordered[int(round(0.50 * last))],
+        'p95': ordered[int(round(0.95 * last))],
+        'p99': ordered[int(round(0.99 * last))],
+        'max': ordered[last],
+    }
+
+
+class FrameStats:
+    # rolling window of frame times
+
+    def __init__(self, size: int = 600):
+        self.samples = deque(maxlen=size)
+
+    def add(self, seconds: float):
+        self.samples.append(seconds)
+
+    def summary(self) -> dict:
+        return percentiles(self.samples)
+
+
+class TickScheduler:
+    # runs callbacks on simulation ticks instead of rendered frames
+
+    def __init__(self):
+        self.tasks = []
+
+    def every(self, ticks: int, callback, offset: int = 0):
+        self.tasks.append((ticks, offset, callback))
+
+    def run(self, tick: int):
+        for interval, offset, callback in self.tasks:
+            if tick >= offset and (tick - offset) % interval == 0:
+                callback()